@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
-from predict_price import predict_price
+from request_log import enable_request_log
+from market_cube import typical_price
+from predict_price import (predict_price, predict_price_progressive, conformal_half_widths, load_model_metadata,
+                           get_model_registry)
 
 # ---------- PAGE CONFIG ----------
 st.set_page_config(
@@ -10,6 +13,9 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# Log every valuation (buffered, written by a background thread)
+enable_request_log()
+
 # ---------- PREMIUM DARK CSS ----------
 st.markdown(
     """
@@ -72,16 +78,34 @@ section[data-testid="stSidebar"]{
 st.sidebar.markdown("<div style='height:14px'></div>", unsafe_allow_html=True)
 st.sidebar.title("Laptop Valuer Pro")
 
+# Figures recorded by train_model.py for the model being served (read once)
+metrics = load_model_metadata().get("metrics")
+if metrics:
+    holdout = metrics["holdout"]
+    cv = metrics["cross_validation"]
+    r2_text = f"{holdout['r2']:.1%}"
+    mae_text = f"INR {holdout['mae']:,.0f}"
+    accuracy_note = (
+        f"Model accuracy on {holdout['n']} held-out laptops: R² = {holdout['r2']:.1%}, "
+        f"Mean Absolute Error = ₹{holdout['mae']:,.0f}, RMSE = ₹{holdout['rmse']:,.0f}"
+    )
+    # The CV figure covers the global model only, not segment models
+    if not get_model_registry().has_segments():
+        accuracy_note += f" ({cv['folds']}-fold CV R² = {cv['r2_mean']:.1%} ± {cv['r2_std']:.1%})"
+else:
+    r2_text = mae_text = "n/a"
+    accuracy_note = "Model accuracy: not recorded, run train_model.py"
+
 st.sidebar.markdown(
-    """
+    f"""
 <div class="lp-card" style="padding:14px;">
-  <div style="font-size:0.95rem; opacity:0.85; margin-bottom:6px;">Model confidence</div>
-  <div style="font-size:1.6rem; font-weight:800; color:#00c853;">86.5%</div>
+  <div style="font-size:0.95rem; opacity:0.85; margin-bottom:6px;">Model confidence (R²)</div>
+  <div style="font-size:1.6rem; font-weight:800; color:#00c853;">{r2_text}</div>
 </div>
 
 <div class="lp-card" style="padding:14px;">
   <div style="font-size:0.95rem; opacity:0.85; margin-bottom:6px;">MAE</div>
-  <div style="font-size:1.6rem; font-weight:800; color:#00c853;">INR 8,665</div>
+  <div style="font-size:1.6rem; font-weight:800; color:#00c853;">{mae_text}</div>
 </div>
 """,
     unsafe_allow_html=True,
@@ -113,7 +137,7 @@ tab_val, tab_info = st.tabs(["Valuation", "Model & notes"])
 with tab_val:
     st.markdown('<div class="lp-card">', unsafe_allow_html=True)
 
-    with st.form("valuation_form", border=False):
+    with st.container():
         c1, c2 = st.columns(2, gap="large")
 
         with c1:
@@ -278,89 +302,140 @@ with tab_val:
                 key="secondary_size"
             )
 
-        submitted = st.form_submit_button("Calculate market value", use_container_width=True)
+        submitted = st.button("Calculate market value", use_container_width=True)
 
     st.markdown("</div>", unsafe_allow_html=True)
 
-    if submitted:
-        # Extract suffix code from selection
-        suffix_map = {
-            "HK (High Performance Mobile)": "HK",
-            "HQ (High Performance Quad Core)": "HQ",
-            "H (High Performance)": "H",
-            "HS (High Performance Slim)": "HS",
-            "U (Ultra-Low Power)": "U",
-            "Y (Extremely Low Power)": "Y",
-            "M (Mobile)": "M",
-            "T (Power Optimized)": "T"
-        }
-        
-        # Extract resolution dimensions
-        resolution_map = {
-            "Standard (1366x768)": ("Standard", 1366, 768),
-            "Full HD (1920x1080)": ("Full HD", 1920, 1080),
-            "Quad HD (2560x1440)": ("Quad HD", 2560, 1440),
-            "Quad HD+ (3200x1800)": ("Quad HD+", 3200, 1800),
-            "4K Ultra HD (3840x2160)": ("4K Ultra HD", 3840, 2160)
-        }
-        
-        res_type, res_width, res_height = resolution_map[resolution_type]
-        
-        # Calculate storage
-        storage_dict = {
-            "HDD": 0,
-            "SSD": 0,
-            "Hybrid": 0,
-            "Flash_Storage": 0
-        }
-        
-        if primary_storage_type != "None":
-            if primary_storage_type == "Flash Storage":
-                storage_dict["Flash_Storage"] += primary_storage_size
-            else:
-                storage_dict[primary_storage_type] += primary_storage_size
-        
-        if secondary_storage_type != "None":
-            if secondary_storage_type == "Flash Storage":
-                storage_dict["Flash_Storage"] += secondary_storage_size
+    # Extract suffix code from selection
+    suffix_map = {
+        "HK (High Performance Mobile)": "HK",
+        "HQ (High Performance Quad Core)": "HQ",
+        "H (High Performance)": "H",
+        "HS (High Performance Slim)": "HS",
+        "U (Ultra-Low Power)": "U",
+        "Y (Extremely Low Power)": "Y",
+        "M (Mobile)": "M",
+        "T (Power Optimized)": "T"
+    }
+    
+    # Extract resolution dimensions
+    resolution_map = {
+        "Standard (1366x768)": ("Standard", 1366, 768),
+        "Full HD (1920x1080)": ("Full HD", 1920, 1080),
+        "Quad HD (2560x1440)": ("Quad HD", 2560, 1440),
+        "Quad HD+ (3200x1800)": ("Quad HD+", 3200, 1800),
+        "4K Ultra HD (3840x2160)": ("4K Ultra HD", 3840, 2160)
+    }
+    
+    res_type, res_width, res_height = resolution_map[resolution_type]
+    
+    # Calculate storage
+    storage_dict = {
+        "HDD": 0,
+        "SSD": 0,
+        "Hybrid": 0,
+        "Flash_Storage": 0
+    }
+    
+    if primary_storage_type != "None":
+        if primary_storage_type == "Flash Storage":
+            storage_dict["Flash_Storage"] += primary_storage_size
+        else:
+            storage_dict[primary_storage_type] += primary_storage_size
+    
+    if secondary_storage_type != "None":
+        if secondary_storage_type == "Flash Storage":
+            storage_dict["Flash_Storage"] += secondary_storage_size
+        else:
+            storage_dict[secondary_storage_type] += secondary_storage_size
+    
+    user_input = {
+        "Company": company,
+        "TypeName": type_name,
+        "Inches": inches,
+        "Ram": ram,
+        "Weight": weight,
+        "OpSys": os_sys,
+        # CPU features
+        "cpu_company": cpu_company,
+        "cpu_line": cpu_line,
+        "cpu_generation": cpu_generation,
+        "cpu_type_suffix": suffix_map.get(cpu_type_suffix, "U"),
+        "cpu_clock_speed": cpu_clock_speed,
+        # Screen features
+        "resolution_type": res_type,
+        "resolution_width": res_width,
+        "resolution_height": res_height,
+        "touchscreen": 1 if touchscreen else 0,
+        "ips_panel": 1 if ips_panel else 0,
+        "retina_display": 1 if retina_display else 0,
+        # GPU features
+        "gpu_company": gpu_company,
+        "gpu_series": gpu_series,
+        "gpu_model": gpu_model if gpu_model else "Unknown",
+        # Storage
+        "HDD": storage_dict["HDD"],
+        "SSD": storage_dict["SSD"],
+        "Hybrid": storage_dict["Hybrid"],
+        "Flash_Storage": storage_dict["Flash_Storage"]
+    }
+
+    # Live estimate: the partial-ensemble preview shows up immediately on every
+    # field change, then the same card is refined with the full model. These
+    # are not valuations yet, so they are not logged or counted for drift
+    st.write("")
+    live_estimate = st.empty()
+    predicted_price = None
+    try:
+        for price, error_bound, is_final in predict_price_progressive(user_input, record=False):
+            if is_final:
+                predicted_price = price
+                detail = "Full model estimate"
             else:
-                storage_dict[secondary_storage_type] += secondary_storage_size
-        
-        user_input = {
-            "Company": company,
-            "TypeName": type_name,
-            "Inches": inches,
-            "Ram": ram,
-            "Weight": weight,
-            "OpSys": os_sys,
-            # CPU features
-            "cpu_company": cpu_company,
-            "cpu_line": cpu_line,
-            "cpu_generation": cpu_generation,
-            "cpu_type_suffix": suffix_map.get(cpu_type_suffix, "U"),
-            "cpu_clock_speed": cpu_clock_speed,
-            # Screen features
-            "resolution_type": res_type,
-            "resolution_width": res_width,
-            "resolution_height": res_height,
-            "touchscreen": 1 if touchscreen else 0,
-            "ips_panel": 1 if ips_panel else 0,
-            "retina_display": 1 if retina_display else 0,
-            # GPU features
-            "gpu_company": gpu_company,
-            "gpu_series": gpu_series,
-            "gpu_model": gpu_model if gpu_model else "Unknown",
-            # Storage
-            "HDD": storage_dict["HDD"],
-            "SSD": storage_dict["SSD"],
-            "Hybrid": storage_dict["Hybrid"],
-            "Flash_Storage": storage_dict["Flash_Storage"]
-        }
+                detail = f"Preview ±₹{error_bound:,.0f}, refining..."
+            live_estimate.markdown(
+                f"""
+<div class="lp-card" style="padding:14px;">
+  <div style="display:flex; align-items:baseline; justify-content:space-between; gap:12px; flex-wrap:wrap;">
+    <div style="opacity:0.78; font-size:0.95rem;">Live estimate</div>
+    <div style="font-size:1.5rem; font-weight:800;">₹{price:,.0f}</div>
+    <div style="opacity:0.7; font-size:0.85rem;">{detail}</div>
+  </div>
+</div>
+""",
+                unsafe_allow_html=True,
+            )
+    except Exception:
+        live_estimate.empty()
 
+    if submitted:
         try:
+            # The recorded valuation (request log, drift monitor)
             with st.spinner("Estimating value..."):
                 predicted_price = predict_price(user_input)
 
+            # Conformal range: a table lookup calibrated at training time
+            half_width = conformal_half_widths([user_input["TypeName"]], [predicted_price])[0]
+            if pd.isna(half_width):
+                range_text = "Price range unavailable for this model."
+            else:
+                range_text = (
+                    f"Likely range ₹{max(predicted_price - half_width, 0):,.0f} - "
+                    f"₹{predicted_price + half_width:,.0f} "
+                    f"({1 - load_model_metadata()['conformal']['alpha']:.0%} of similar laptops)"
+                )
+
+            # Market context: a lookup in the precomputed aggregate cube
+            market = typical_price(user_input)
+            market_html = ""
+            if market is not None:
+                segment, stats = market
+                market_html = (
+                    f'<div style="margin-top:6px; opacity:0.85; font-size:1rem;">'
+                    f"Typical {segment}: ₹{stats['median']:,.0f} "
+                    f"(middle half ₹{stats['p25']:,.0f} - ₹{stats['p75']:,.0f}, {stats['count']} listings)</div>"
+                )
+
             st.write("")
             st.markdown(
                 f"""
@@ -369,6 +444,8 @@ with tab_val:
     <div>
       <div style="opacity:0.78; font-size:0.95rem;">Estimated valuation</div>
       <div style="font-size:2.4rem; font-weight:800; margin-top:6px;">₹{predicted_price:,.2f}</div>
+      <div style="margin-top:6px; opacity:0.85; font-size:1rem;">{range_text}</div>
+      {market_html}
       <div style="margin-top:8px; opacity:0.75; font-size:0.95rem;">Adjust one field at a time for better comparisons.</div>
     </div>
     <div style="min-width:220px;">
@@ -387,14 +464,14 @@ with tab_val:
 
 with tab_info:
     st.markdown(
-        """
+        f"""
 <div class="lp-card">
   <h3 style="margin-top:0;">Model & notes</h3>
   <ul style="margin-bottom:0; opacity:0.9;">
     <li>This is a data science project using structured laptop specs to estimate market value.</li>
     <li>All inputs are dropdown-based for accuracy and ease of use.</li>
     <li>The model uses Gradient Boosting trained on 2,500+ laptops from 2017-2020.</li>
-    <li>Model accuracy: R² = 86.5%, Mean Absolute Error = ₹8,665</li>
+    <li>{accuracy_note}</li>
     <li>Select specifications that match your laptop as closely as possible.</li>
     <li>For best results, ensure all hardware specs are accurately selected.</li>
   </ul>
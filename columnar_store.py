@@ -0,0 +1,189 @@
+"""
+TYPED COLUMNAR STORAGE FOR THE LISTING DATASETS
+===============================================
+A table is a directory (e.g. laptop_data.cols/) holding one .npy
+file per column and a _schema.json listing the columns in order:
+
+  numeric / bool columns   stored as-is, read back into memory (or
+                           memory-mapped read-only with mmap=True)
+  string columns           dictionary-encoded: int32 codes (-1 = missing) in
+                           the .npy, the distinct values in the schema
+
+Reading a table only opens the requested columns and needs no parsing, so
+loads take milliseconds instead of a full CSV parse. The schema also records
+the size and mtime of the CSV a table was converted from; load_dataset()
+falls back to the CSV when the table is missing or older than its source.
+
+Run as a script to convert the project CSVs (raw, merged and featurized).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = '_schema.json'
+STORE_SUFFIX = '.cols'
+
+# CSVs converted by the script
+RAW_DATASETS = ['laptop_data.csv', 'new_data_set.csv', 'laptop_data_merged_clean.csv']
+
+
+def store_path_for(csv_path):
+    """Columnar table next to a CSV: laptop_data.csv -> laptop_data.cols"""
+    return os.path.splitext(csv_path)[0] + STORE_SUFFIX
+
+
+def source_fingerprint(path):
+    """(size, mtime) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def write_table(df, path, source=None):
+    """Write a DataFrame as a columnar table (replacing any previous one at path)"""
+
+    columns = []
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        file_name = f"{i:03d}.npy"
+        column = {'name': name, 'file': file_name, 'dtype': str(series.dtype)}
+
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            column['kind'] = 'numeric'
+            values = np.ascontiguousarray(series.to_numpy())
+        elif pd.api.types.is_string_dtype(series) or series.dtype == object:
+            column['kind'] = 'string'
+            codes, categories = pd.factorize(series, use_na_sentinel=True)
+            column['categories'] = [str(value) for value in categories]
+            values = codes.astype(np.int32)
+        else:
+            raise TypeError(f"Column {name!r} has unsupported dtype {series.dtype}")
+
+        np.save(os.path.join(tmp_path, file_name), values, allow_pickle=False)
+        columns.append(column)
+
+    schema = {
+        'version': 1,
+        'n_rows': len(df),
+        'columns': columns,
+        'source': {'path': source, 'fingerprint': source_fingerprint(source)} if source else None,
+    }
+    with open(os.path.join(tmp_path, SCHEMA_FILE), 'w', encoding='utf-8') as file:
+        json.dump(schema, file, indent=1, ensure_ascii=False)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+
+def read_schema(path):
+    with open(os.path.join(path, SCHEMA_FILE), encoding='utf-8') as file:
+        return json.load(file)
+
+
+def read_column(path, name, schema=None, mmap=False):
+    """
+    One column as a numpy array: numeric columns as stored (memory-mapped
+    and read-only with mmap=True), string columns as an object array with
+    NaN for missing values.
+    """
+    schema = schema or read_schema(path)
+    column = next((c for c in schema['columns'] if c['name'] == name), None)
+    if column is None:
+        raise KeyError(f"{path} has no column {name!r}")
+
+    values = np.load(os.path.join(path, column['file']), mmap_mode='r' if mmap else None, allow_pickle=False)
+    if column['kind'] == 'numeric':
+        return values
+
+    categories = np.array(column['categories'] + [np.nan], dtype=object)
+    # Code -1 (missing) picks the trailing NaN
+    return categories[values]
+
+
+def read_table(path, columns=None, mmap=False):
+    """
+    DataFrame of the requested columns (all by default, in stored order).
+
+    With mmap=True numeric columns are backed by the memory-mapped files
+    instead of being read into memory: cheaper for large read-only scans,
+    but those columns are read-only, so copy the frame before modifying it.
+    """
+    schema = read_schema(path)
+    dtypes = {c['name']: c['dtype'] for c in schema['columns']}
+    names = [c['name'] for c in schema['columns']] if columns is None else list(columns)
+
+    data = {}
+    for name in names:
+        values = read_column(path, name, schema, mmap)
+        if values.dtype == object:
+            values = pd.array(values, dtype=dtypes[name]) if dtypes[name] != 'object' else values
+        data[name] = values
+    return pd.DataFrame(data, index=pd.RangeIndex(schema['n_rows']), copy=False)
+
+
+def is_fresh(path, source):
+    """True if the table at path exists and was converted from the current version of source"""
+    try:
+        schema = read_schema(path)
+    except FileNotFoundError:
+        return False
+    if schema.get('source') is None:
+        return True
+    fingerprint = source_fingerprint(source)
+    return fingerprint is None or schema['source']['fingerprint'] == fingerprint
+
+
+def load_dataset(csv_path, columns=None, mmap=False):
+    """A CSV dataset, read from its columnar table when that is up to date (see read_table for mmap)"""
+    store_path = store_path_for(csv_path)
+    if is_fresh(store_path, csv_path):
+        return read_table(store_path, columns, mmap)
+    return pd.read_csv(csv_path, usecols=columns)
+
+
+def convert_csv(csv_path, store_path=None):
+    """Convert one CSV to a columnar table; returns the table path"""
+    store_path = store_path or store_path_for(csv_path)
+    write_table(pd.read_csv(csv_path), store_path, source=csv_path)
+    return store_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv', nargs='*', default=RAW_DATASETS, help='CSVs to convert (default: the project datasets)')
+    args = parser.parse_args()
+
+    from feature_engineering import DATA_PATH, FEATURES_PATH, build_feature_store
+
+    print("\n" + "="*70)
+    print("CONVERTING DATASETS TO COLUMNAR TABLES")
+    print("="*70)
+    for csv_path in args.csv:
+        store_path = convert_csv(csv_path)
+        start = time.perf_counter()
+        pd.read_csv(csv_path)
+        csv_ms = (time.perf_counter() - start) * 1e3
+        start = time.perf_counter()
+        table = read_table(store_path)
+        table_ms = (time.perf_counter() - start) * 1e3
+        print(f"✅ {csv_path} -> {store_path} ({table.shape[0]} rows x {table.shape[1]} columns, "
+              f"read {table_ms:.1f} ms vs {csv_ms:.1f} ms from CSV)")
+
+    if DATA_PATH in args.csv:
+        build_feature_store()
+        print(f"✅ {DATA_PATH} -> {FEATURES_PATH} (parsed specs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Online drift monitoring of valuation requests.
+
+A training profile (histogram edges and proportions for numeric features,
+category shares for categorical ones) is stored in the model metadata by
+train_model.py. DriftMonitor keeps fixed-size counters shaped like that
+profile and updates them for every request passing through predict_price or
+predict_prices, so memory stays constant however much traffic it sees.
+Values never seen in training are tracked with a Misra-Gries heavy-hitters
+summary of fixed capacity.
+"""
+
+import math
+import threading
+from bisect import bisect_right
+import numpy as np
+import pandas as pd
+
+NUMERIC_FEATURES = [
+    'Inches', 'Ram', 'Weight', 'cpu_generation', 'cpu_clock_speed',
+    'HDD', 'SSD', 'Hybrid', 'Flash_Storage', 'resolution_width', 'resolution_height',
+    'touchscreen', 'ips_panel', 'retina_display',
+]
+
+CATEGORICAL_FEATURES = [
+    'Company', 'TypeName', 'OpSys', 'cpu_company', 'cpu_line', 'cpu_type_suffix',
+    'resolution_type', 'gpu_company', 'gpu_series',
+]
+
+# Proportions are floored at this value so unseen bins give a finite PSI
+EPSILON = 1e-4
+
+
+def training_profile(df, n_bins=10):
+    """Snapshot of the training distribution of the parsed specs in df"""
+
+    numeric = {}
+    for feature in NUMERIC_FEATURES:
+        values = df[feature].dropna().to_numpy(dtype=float)
+        # Internal quantile edges; bins are (-inf, e1), [e1, e2), ..., [ek, inf)
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])).tolist()
+        counts = np.bincount([bisect_right(edges, v) for v in values], minlength=len(edges) + 1)
+        numeric[feature] = {'edges': edges, 'proportions': (counts / counts.sum()).tolist()}
+
+    categorical = {}
+    for feature in CATEGORICAL_FEATURES:
+        categorical[feature] = df[feature].astype(str).value_counts(normalize=True).to_dict()
+
+    return {'numeric': numeric, 'categorical': categorical, 'n': int(len(df))}
+
+
+def population_stability_index(expected, observed):
+    """PSI between two proportion vectors"""
+    expected = np.maximum(np.asarray(expected, dtype=float), EPSILON)
+    observed = np.maximum(np.asarray(observed, dtype=float), EPSILON)
+    return float(np.sum((observed - expected) * np.log(observed / expected)))
+
+
+class DriftMonitor:
+    """Constant-memory per-feature sketches of incoming requests, compared to a training profile"""
+
+    def __init__(self, profile, max_unseen=32):
+        self.profile = profile
+        self.max_unseen = max_unseen
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.n = 0
+            self.numeric_counts = {
+                feature: np.zeros(len(spec['edges']) + 1, dtype=np.int64)
+                for feature, spec in self.profile['numeric'].items()
+            }
+            self.missing_counts = dict.fromkeys(self.profile['numeric'], 0)
+            # Known categories only, so the table size is fixed by the profile
+            self.category_counts = {
+                feature: dict.fromkeys(shares, 0)
+                for feature, shares in self.profile['categorical'].items()
+            }
+            self.unseen_counts = dict.fromkeys(self.profile['categorical'], 0)
+            self.unseen_values = {feature: {} for feature in self.profile['categorical']}
+
+    def _count_unseen(self, feature, value, count=1):
+        """Misra-Gries update: at most max_unseen counters per feature"""
+        self.unseen_counts[feature] += count
+        heavy = self.unseen_values[feature]
+        if value in heavy or len(heavy) < self.max_unseen:
+            heavy[value] = heavy.get(value, 0) + count
+            return
+
+        decrement = min(count, min(heavy.values()))
+        for key in list(heavy):
+            heavy[key] -= decrement
+            if heavy[key] <= 0:
+                del heavy[key]
+        if count > decrement:
+            heavy[value] = count - decrement
+
+    def observe(self, user_data):
+        """Update the sketches with one request (dict of parsed specs)"""
+        with self._lock:
+            self.n += 1
+            for feature, spec in self.profile['numeric'].items():
+                try:
+                    value = float(user_data.get(feature))
+                except (TypeError, ValueError):
+                    value = math.nan
+                if math.isnan(value):
+                    self.missing_counts[feature] += 1
+                else:
+                    self.numeric_counts[feature][bisect_right(spec['edges'], value)] += 1
+
+            for feature, counts in self.category_counts.items():
+                value = str(user_data.get(feature))
+                if value in counts:
+                    counts[value] += 1
+                else:
+                    self._count_unseen(feature, value)
+
+    def observe_batch(self, rows):
+        """Vectorized update with many requests (list of dicts or DataFrame)"""
+        df = pd.DataFrame(rows)
+        numeric_updates = {}
+        for feature, spec in self.profile['numeric'].items():
+            if feature in df:
+                values = pd.to_numeric(df[feature], errors='coerce').to_numpy(dtype=float)
+            else:
+                values = np.full(len(df), np.nan)
+            present = values[~np.isnan(values)]
+            bins = np.searchsorted(spec['edges'], present, side='right')
+            numeric_updates[feature] = (np.bincount(bins, minlength=len(spec['edges']) + 1),
+                                        len(values) - len(present))
+        category_updates = {
+            feature: df[feature].astype(str).value_counts().to_dict() if feature in df else {'None': len(df)}
+            for feature in self.category_counts
+        }
+
+        with self._lock:
+            self.n += len(df)
+            for feature, (counts, missing) in numeric_updates.items():
+                self.numeric_counts[feature] += counts
+                self.missing_counts[feature] += missing
+            for feature, value_counts in category_updates.items():
+                counts = self.category_counts[feature]
+                for value, count in value_counts.items():
+                    if value in counts:
+                        counts[value] += count
+                    else:
+                        self._count_unseen(feature, value, count)
+
+    def report(self):
+        """Drift score (PSI) per feature against the training profile, most drifted first"""
+        with self._lock:
+            rows = []
+            for feature, spec in self.profile['numeric'].items():
+                counts = self.numeric_counts[feature]
+                total = counts.sum()
+                psi = population_stability_index(spec['proportions'], counts / total) if total else 0.0
+                rows.append({'feature': feature, 'type': 'numeric', 'psi': psi,
+                             'unseen_share': 0.0, 'missing_share': self.missing_counts[feature] / max(self.n, 1),
+                             'top_unseen': []})
+
+            for feature, shares in self.profile['categorical'].items():
+                counts = self.category_counts[feature]
+                total = sum(counts.values()) + self.unseen_counts[feature]
+                if total:
+                    expected = list(shares.values()) + [0.0]
+                    observed = [counts[value] / total for value in shares] + [self.unseen_counts[feature] / total]
+                    psi = population_stability_index(expected, observed)
+                else:
+                    psi = 0.0
+                top_unseen = sorted(self.unseen_values[feature].items(), key=lambda item: -item[1])[:5]
+                rows.append({'feature': feature, 'type': 'categorical', 'psi': psi,
+                             'unseen_share': self.unseen_counts[feature] / total if total else 0.0,
+                             'missing_share': 0.0, 'top_unseen': [value for value, _ in top_unseen]})
+
+        return pd.DataFrame(rows).sort_values('psi', ascending=False, ignore_index=True)
@@ -0,0 +1,339 @@
+"""
+Feature engineering shared by the offline tools.
+
+The parsing below is the same as in EDA.ipynb, so the tools can rebuild the
+training features and the held-out split of the saved model without running
+the notebook.
+"""
+
+import os
+import re
+import pandas as pd
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+from sklearn.model_selection import train_test_split
+
+from columnar_store import STORE_SUFFIX, load_dataset, read_table, write_table, is_fresh
+
+DATA_PATH = 'laptop_data_merged_clean.csv'
+
+# Parsed specs of DATA_PATH as a columnar table (see build_feature_store)
+FEATURES_PATH = 'laptop_data_merged_clean_features.cols'
+
+# Same split as the notebook that produced laptop_price_model.pkl
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+
+def parse_cpu_column(df, cpu_column='cpu'):
+    """Parse CPU column into company, line, generation, suffix and clock speed"""
+
+    def extract_cpu_features(cpu_string):
+        features = {
+            'cpu_company': None,
+            'cpu_line': None,
+            'cpu_generation': None,
+            'cpu_type_suffix': None,
+            'cpu_clock_speed': None
+        }
+
+        if pd.isna(cpu_string):
+            return features
+
+        cpu_string = str(cpu_string)
+
+        # 1. Company
+        if 'Intel' in cpu_string:
+            features['cpu_company'] = 'Intel'
+        elif 'AMD' in cpu_string:
+            features['cpu_company'] = 'AMD'
+        elif 'Samsung' in cpu_string:
+            features['cpu_company'] = 'Samsung'
+        else:
+            features['cpu_company'] = 'Other'
+
+        # 2. Processor line
+        intel_match = re.search(r'(Core i\d|Xeon|Pentium|Celeron|Atom|Core M)', cpu_string, re.IGNORECASE)
+        if intel_match:
+            features['cpu_line'] = intel_match.group(1)
+
+        ryzen_match = re.search(r'Ryzen\s*(\d)', cpu_string, re.IGNORECASE)
+        a_match = re.search(r'A(\d+)-Series', cpu_string, re.IGNORECASE)
+
+        if ryzen_match:
+            features['cpu_line'] = f'Ryzen {ryzen_match.group(1)}'
+        elif a_match:
+            features['cpu_line'] = f'A{a_match.group(1)}-Series'
+        elif 'E-Series' in cpu_string or 'E2' in cpu_string:
+            features['cpu_line'] = 'E-Series'
+
+        # 3. Generation (first digit of the model number)
+        gen_match = re.search(r'(\d)(\d{3})', cpu_string)
+        if gen_match:
+            features['cpu_generation'] = int(gen_match.group(1))
+
+        # 4. Suffix (U, H, HQ, HK, ...)
+        suffix_match = re.search(r'\d{3,4}([A-Z]{1,2})\b', cpu_string)
+        if suffix_match:
+            features['cpu_type_suffix'] = suffix_match.group(1)
+
+        # 5. Clock speed (GHz)
+        speed_match = re.search(r'(\d+\.?\d*)\s*GHz', cpu_string)
+        if speed_match:
+            features['cpu_clock_speed'] = float(speed_match.group(1))
+
+        return features
+
+    parsed_df = pd.DataFrame(df[cpu_column].apply(extract_cpu_features).tolist(), index=df.index)
+    return pd.concat([df, parsed_df], axis=1)
+
+
+def parse_memory_column(df, memory_column='Memory'):
+    """Split Memory strings like '128GB SSD + 1TB HDD' into HDD/SSD/Hybrid/Flash_Storage sizes"""
+
+    memory = df[memory_column].astype(str).replace(r'\.0', '', regex=True)
+    memory = memory.str.replace('GB', '').str.replace('TB', '000')
+    layers = memory.str.split('+', n=1, expand=True)
+    first = layers[0].str.strip()
+    second = layers[1].fillna('0') if 1 in layers.columns else pd.Series('0', index=df.index)
+
+    first_size = first.str.replace(r'\D', '', regex=True).astype(int)
+    second_size = second.str.replace(r'\D', '', regex=True).astype(int)
+
+    df = df.copy()
+    for column, label in [('HDD', 'HDD'), ('SSD', 'SSD'), ('Hybrid', 'Hybrid'), ('Flash_Storage', 'Flash Storage')]:
+        df[column] = (first_size * first.str.contains(label, regex=False).astype(int)
+                      + second_size * second.str.contains(label, regex=False).astype(int))
+
+    return df.drop(memory_column, axis=1)
+
+
+def parse_screen_resolution(df, screen_column='ScreenResolution'):
+    """Parse ScreenResolution column into panel flags, resolution type and dimensions"""
+
+    def extract_screen_features(screen_string):
+        features = {
+            'resolution_type': None,
+            'ips_panel': 0,
+            'touchscreen': 0,
+            'retina_display': 0,
+            'resolution_width': None,
+            'resolution_height': None
+        }
+
+        if pd.isna(screen_string):
+            return features
+
+        screen_string = str(screen_string)
+
+        if 'IPS Panel' in screen_string:
+            features['ips_panel'] = 1
+        if 'Touchscreen' in screen_string:
+            features['touchscreen'] = 1
+        if 'Retina Display' in screen_string:
+            features['retina_display'] = 1
+
+        if '4K Ultra HD' in screen_string:
+            features['resolution_type'] = '4K Ultra HD'
+        elif 'Quad HD+' in screen_string:
+            features['resolution_type'] = 'Quad HD+'
+        elif 'Full HD' in screen_string:
+            features['resolution_type'] = 'Full HD'
+        elif 'Quad HD' in screen_string:
+            features['resolution_type'] = 'Quad HD'
+        else:
+            features['resolution_type'] = 'Standard'
+
+        resolution_match = re.search(r'(\d{3,4})x(\d{3,4})', screen_string)
+        if resolution_match:
+            features['resolution_width'] = int(resolution_match.group(1))
+            features['resolution_height'] = int(resolution_match.group(2))
+
+        return features
+
+    parsed_df = pd.DataFrame(df[screen_column].apply(extract_screen_features).tolist(), index=df.index)
+    return pd.concat([df, parsed_df], axis=1).drop(screen_column, axis=1)
+
+
+def parse_gpu_column(df, gpu_column='Gpu'):
+    """Parse GPU column into company, series and model number"""
+
+    def extract_gpu_features(gpu_string):
+        features = {
+            'gpu_company': None,
+            'gpu_series': None,
+            'gpu_model': None
+        }
+
+        if pd.isna(gpu_string):
+            return features
+
+        gpu_string = str(gpu_string)
+
+        if 'Intel' in gpu_string:
+            features['gpu_company'] = 'Intel'
+        elif 'Nvidia' in gpu_string or 'GeForce' in gpu_string:
+            features['gpu_company'] = 'Nvidia'
+        elif 'AMD' in gpu_string or 'Radeon' in gpu_string:
+            features['gpu_company'] = 'AMD'
+        elif 'ARM' in gpu_string:
+            features['gpu_company'] = 'ARM'
+        else:
+            features['gpu_company'] = 'Other'
+
+        if features['gpu_company'] == 'Intel':
+            if 'UHD Graphics' in gpu_string:
+                features['gpu_series'] = 'UHD Graphics'
+            elif 'HD Graphics' in gpu_string:
+                features['gpu_series'] = 'HD Graphics'
+            elif 'Iris' in gpu_string:
+                if 'Iris Plus' in gpu_string:
+                    features['gpu_series'] = 'Iris Plus'
+                elif 'Iris Pro' in gpu_string:
+                    features['gpu_series'] = 'Iris Pro'
+                else:
+                    features['gpu_series'] = 'Iris'
+
+        elif features['gpu_company'] == 'Nvidia':
+            if 'GTX' in gpu_string:
+                if 'GTX 10' in gpu_string:
+                    features['gpu_series'] = 'GTX 10 Series'
+                elif 'GTX 9' in gpu_string:
+                    features['gpu_series'] = 'GTX 9 Series'
+                elif 'GTX 8' in gpu_string:
+                    features['gpu_series'] = 'GTX 8 Series'
+                elif 'GTX 7' in gpu_string:
+                    features['gpu_series'] = 'GTX 7 Series'
+                else:
+                    features['gpu_series'] = 'GTX'
+            elif 'RTX' in gpu_string:
+                features['gpu_series'] = 'RTX'
+            elif 'MX' in gpu_string:
+                features['gpu_series'] = 'MX'
+            elif 'Quadro' in gpu_string:
+                features['gpu_series'] = 'Quadro'
+            else:
+                features['gpu_series'] = 'GeForce'
+
+        elif features['gpu_company'] == 'AMD':
+            if 'Radeon Pro' in gpu_string:
+                features['gpu_series'] = 'Radeon Pro'
+            elif 'Radeon RX' in gpu_string:
+                features['gpu_series'] = 'Radeon RX'
+            elif 'Radeon R7' in gpu_string:
+                features['gpu_series'] = 'Radeon R7'
+            elif 'Radeon R5' in gpu_string:
+                features['gpu_series'] = 'Radeon R5'
+            elif 'Radeon' in gpu_string:
+                features['gpu_series'] = 'Radeon'
+            elif 'FirePro' in gpu_string:
+                features['gpu_series'] = 'FirePro'
+
+        elif features['gpu_company'] == 'ARM':
+            if 'Mali' in gpu_string:
+                features['gpu_series'] = 'Mali'
+
+        model_match = re.search(r'(\d{3,4}[A-Z]{0,3})', gpu_string)
+        if model_match:
+            features['gpu_model'] = model_match.group(1)
+
+        return features
+
+    parsed_df = pd.DataFrame(df[gpu_column].apply(extract_gpu_features).tolist(), index=df.index)
+    return pd.concat([df, parsed_df], axis=1).drop(gpu_column, axis=1)
+
+
+def parse_listings(df):
+    """Turn raw listing rows (Cpu, Memory, ScreenResolution, Gpu strings) into parsed spec columns"""
+
+    df = df.reset_index(drop=True).rename(columns={'Cpu': 'cpu'})
+    df['Ram'] = df['Ram'].astype(str).str.replace('GB', '').astype('int64')
+    df['Weight'] = df['Weight'].astype(str).str.replace('kg', '').astype('float64')
+
+    df = parse_cpu_column(df).drop('cpu', axis=1)
+    df = parse_memory_column(df)
+    df = parse_screen_resolution(df)
+    df = parse_gpu_column(df)
+
+    df['cpu_generation'] = df['cpu_generation'].fillna(df['cpu_generation'].mode()[0])
+    df['cpu_line'] = df['cpu_line'].fillna('Unknown')
+    df['cpu_type_suffix'] = df['cpu_type_suffix'].fillna('Unknown')
+    df['resolution_type'] = df['resolution_type'].fillna('Standard')
+
+    return df
+
+
+def features_path_for(path):
+    """Columnar table of the parsed specs of a listings CSV"""
+    return os.path.splitext(path)[0] + '_features' + STORE_SUFFIX
+
+
+def build_feature_store(path=DATA_PATH):
+    """Parse a listings CSV once and store the specs as a columnar table for load_listings"""
+    write_table(parse_listings(load_dataset(path)), features_path_for(path), source=path)
+
+
+def load_listings(path=DATA_PATH, columns=None, mmap=False):
+    """
+    Load the cleaned dataset as parsed specs (the same keys predict_price
+    expects) plus Price, optionally only the given columns.
+
+    Reads the featurized table written by build_feature_store when it is up
+    to date with the CSV, otherwise parses the CSV. mmap=True memory-maps
+    the numeric columns of the table read-only (see columnar_store.read_table).
+    """
+    features_path = features_path_for(path)
+    if is_fresh(features_path, path):
+        return read_table(features_path, columns, mmap)
+
+    df = parse_listings(load_dataset(path))
+    return df if columns is None else df[list(columns)]
+
+
+def encode_features(df):
+    """Encode parsed specs exactly like the notebook did before training"""
+
+    df = df.copy()
+
+    cpu_line_mapping = {
+        'Core i3': 3, 'Core i5': 5, 'Core i7': 7, 'Core i9': 9,
+        'Ryzen 3': 3, 'Ryzen 5': 5, 'Ryzen 7': 7, 'Ryzen 9': 9,
+        'Pentium': 2, 'Celeron': 1, 'Xeon': 8, 'Core M': 4,
+        'A4-Series': 1.5, 'A6-Series': 2, 'A8-Series': 2.5,
+        'A9-Series': 3, 'A10-Series': 3.5, 'A12-Series': 4,
+        'E-Series': 1, 'Unknown': 3
+    }
+    df['cpu_line'] = df['cpu_line'].map(cpu_line_mapping)
+
+    cpu_type_mapping = {'HK': 6, 'HQ': 5, 'H': 4, 'HS': 3, 'U': 2, 'Y': 1, 'M': 2, 'T': 2, 'Unknown': 2}
+    df['cpu_type_suffix'] = df['cpu_type_suffix'].map(cpu_type_mapping)
+
+    resolution_mapping = {'Standard': 1, 'Full HD': 2, 'Quad HD': 3, 'Quad HD+': 4, '4K Ultra HD': 5}
+    df['resolution_type'] = df['resolution_type'].map(resolution_mapping)
+
+    le = LabelEncoder()
+    df['gpu_model'] = le.fit_transform(df['gpu_model'].astype(str))
+
+    cols_to_encode = ['Company', 'TypeName', 'OpSys', 'cpu_company', 'gpu_company', 'gpu_series']
+    return pd.get_dummies(df, columns=[col for col in cols_to_encode if col in df.columns], drop_first=True)
+
+
+def split_listings(df):
+    """Train/test split of the listings using the notebook's parameters"""
+    return train_test_split(df, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+
+
+def load_holdout_set(path=DATA_PATH):
+    """
+    Held-out listings of the saved model.
+
+    Returns the parsed test specs (with missing numerics filled from the
+    training split) and their prices.
+    """
+    train, test = split_listings(load_listings(path))
+
+    numeric_columns = test.select_dtypes(include=[np.number]).columns.drop('Price')
+    test = test.copy()
+    test[numeric_columns] = test[numeric_columns].fillna(train[numeric_columns].median())
+
+    return test.drop('Price', axis=1), test['Price']
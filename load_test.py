@@ -0,0 +1,249 @@
+"""
+SYNTHETIC LOAD GENERATOR FOR THE VALUATION PATH
+===============================================
+Samples realistic laptop specs from the cleaned dataset (whole listings, so
+the joint distribution of company, CPU, GPU, storage... is preserved) and
+mixes in a tunable share of specs the model never saw in training (Windows
+11, 12th-14th gen CPUs, RTX 40/50 series...).
+
+The specs drive predict_price from many threads at a target request rate,
+either in-process or through a local HTTP stand-in, and the run reports
+throughput, latency percentiles, cache hit rates and memory over time.
+Everything runs offline.
+
+Most sampled specs are catalog specs, which predict_price answers from the
+price table; --no-price-table sends every request through the model.
+"""
+
+import argparse
+import json
+import resource
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+from feature_engineering import load_listings
+from predict_price import predict_price, load_model, load_model_metadata, model_version
+from price_table import get_price_table
+
+# Spec changes that produce combinations outside the 2017-2020 training data
+UNSEEN_VARIANTS = [
+    {'OpSys': 'Windows 11'},
+    {'cpu_company': 'Intel', 'cpu_line': 'Core i7', 'cpu_generation': 14, 'cpu_type_suffix': 'H'},
+    {'cpu_company': 'Intel', 'cpu_line': 'Core i5', 'cpu_generation': 13, 'cpu_type_suffix': 'U'},
+    {'cpu_company': 'Intel', 'cpu_line': 'Core i9', 'cpu_generation': 12, 'cpu_type_suffix': 'HK'},
+    {'cpu_company': 'AMD', 'cpu_line': 'Ryzen 7', 'cpu_generation': 7, 'cpu_type_suffix': 'HS'},
+    {'gpu_company': 'Nvidia', 'gpu_series': 'RTX 40 Series', 'gpu_model': '4060'},
+    {'gpu_company': 'Nvidia', 'gpu_series': 'RTX 50 Series', 'gpu_model': '5070'},
+    {'gpu_company': 'Intel', 'gpu_series': 'Iris Xe Graphics', 'gpu_model': 'Unknown'},
+    {'Ram': 32, 'SSD': 1024, 'HDD': 0},
+]
+
+# lru_cache-backed lookups on the prediction path
+CACHES = {
+    'load_model': load_model,
+    'model_version': model_version,
+    'load_model_metadata': load_model_metadata,
+}
+
+
+class SpecSampler:
+    """Draws request specs from the listings, with unseen_share of them mutated into unseen combinations"""
+
+    def __init__(self, listings, unseen_share=0.1, seed=42):
+        self.specs = listings.drop('Price', axis=1).to_dict('records')
+        self.unseen_share = unseen_share
+        self.rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            spec = dict(self.specs[self.rng.integers(len(self.specs))])
+            if self.rng.random() < self.unseen_share:
+                for i in self.rng.choice(len(UNSEEN_VARIANTS), size=self.rng.integers(1, 3), replace=False):
+                    spec.update(UNSEEN_VARIANTS[i])
+        return spec
+
+
+def current_rss_mb():
+    """Resident memory of this process in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _PredictHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        spec = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        price = predict_price(spec, use_price_table=self.server.use_price_table)
+        body = json.dumps({'price': float(price)}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_stand_in(port=0, use_price_table=True):
+    """Serve POST /predict on localhost from a background thread; returns the server"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), _PredictHandler)
+    server.use_price_table = use_price_table
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def http_predictor(url):
+    def predict(spec):
+        request = urllib.request.Request(url, data=json.dumps(spec, default=str).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())['price']
+    return predict
+
+
+def run_load(predict, sampler, rate, duration, threads, memory_interval=1.0):
+    """
+    Open-loop load: request i is due at start + i / rate and is picked up by
+    the next free thread. Latency is measured from the due time, so queueing
+    behind a saturated path shows up in the percentiles.
+    """
+
+    latencies = []
+    errors = []
+    memory = []
+    next_index = [0]
+    lock = threading.Lock()
+    total = int(rate * duration)
+    start = time.perf_counter()
+
+    def worker():
+        while True:
+            with lock:
+                i = next_index[0]
+                next_index[0] += 1
+            if i >= total:
+                return
+            due = start + i / rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            spec = sampler.sample()
+            try:
+                predict(spec)
+                elapsed = time.perf_counter() - due
+                with lock:
+                    latencies.append(elapsed)
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+
+    done = threading.Event()
+
+    def sample_memory():
+        while not done.wait(memory_interval):
+            memory.append((time.perf_counter() - start, current_rss_mb()))
+
+    memory.append((0.0, current_rss_mb()))
+    monitor = threading.Thread(target=sample_memory, daemon=True)
+    monitor.start()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    elapsed = time.perf_counter() - start
+    done.set()
+    monitor.join()
+    memory.append((elapsed, current_rss_mb()))
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'elapsed': elapsed,
+        'latencies_ms': np.array(latencies) * 1e3,
+        'memory_mb': memory,
+    }
+
+
+def cache_stats():
+    """Hit rate of each cache on the prediction path"""
+    stats = {}
+    for name, cached in CACHES.items():
+        info = cached.cache_info()
+        lookups = info.hits + info.misses
+        stats[name] = (info.hits, lookups)
+
+    table = get_price_table()
+    if table is not None:
+        stats['price_table'] = (table.hits, table.hits + table.misses)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=float, default=50, help='target requests per second (default: 50)')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load (default: 10)')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent client threads (default: 8)')
+    parser.add_argument('--unseen-share', type=float, default=0.1,
+                        help='share of specs mutated into unseen combinations (default: 0.1)')
+    parser.add_argument('--mode', choices=['inprocess', 'http'], default='inprocess')
+    parser.add_argument('--no-price-table', action='store_true',
+                        help='answer catalog specs with the model instead of the price table')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    use_price_table = not args.no_price_table
+
+    sampler = SpecSampler(load_listings(), args.unseen_share, args.seed)
+
+    server = None
+    if args.mode == 'http':
+        server = start_http_stand_in(use_price_table=use_price_table)
+        predict = http_predictor(f"http://127.0.0.1:{server.server_address[1]}/predict")
+    else:
+        predict = lambda spec: predict_price(spec, use_price_table=use_price_table)
+
+    print(f"Driving {args.mode} predict_price at {args.rate:g} req/s for {args.duration:g}s "
+          f"from {args.threads} threads ({args.unseen_share:.0%} unseen specs, "
+          f"price table {'on' if use_price_table else 'off'})...")
+    result = run_load(predict, sampler, args.rate, args.duration, args.threads)
+
+    if server is not None:
+        server.shutdown()
+
+    latencies = result['latencies_ms']
+    print("\n" + "="*70)
+    print("LOAD TEST RESULTS")
+    print("="*70)
+    print(f"Requests:   {result['requests']} ok, {len(result['errors'])} errors in {result['elapsed']:.1f}s")
+    print(f"Throughput: {result['requests'] / result['elapsed']:,.1f} req/s (target {args.rate:g})")
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"Latency:    p50 {p50:,.2f} ms | p95 {p95:,.2f} ms | p99 {p99:,.2f} ms | max {latencies.max():,.2f} ms")
+    if result['errors']:
+        print(f"First error: {result['errors'][0]}")
+
+    print("\nCache hit rates:")
+    for name, (hits, lookups) in cache_stats().items():
+        rate = hits / lookups if lookups else 0.0
+        print(f"  {name:<22} {rate:6.1%} ({hits}/{lookups})")
+
+    print("\nMemory (RSS):")
+    memory = result['memory_mb']
+    step = max(len(memory) // 20, 1)
+    for t, rss in memory[::step] + ([memory[-1]] if (len(memory) - 1) % step else []):
+        print(f"  t={t:6.1f}s  {rss:,.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
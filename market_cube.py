@@ -0,0 +1,244 @@
+"""
+MARKET AGGREGATE CUBE
+=====================
+Precomputed price statistics of the listings over Company x TypeName x
+cpu_line x price band. Every cell keeps count, sum and sum of squares of
+the prices plus a fixed log-spaced price histogram, so means, spreads and
+quantiles of any cell or roll-up (e.g. mean price by Company, as in the
+notebook) come from summing a few small arrays instead of a groupby over
+the whole frame.
+
+The cube is additive: new listings are folded in with add() without
+touching the existing ones, and unseen companies or CPU lines simply extend
+the cube. It is stored compressed in market_cube.npz and loaded once per
+process by get_market_cube().
+
+Run as a script to build the cube from the cleaned dataset, or with --add
+to fold new listings (CSV in the cleaned-dataset format) into it.
+"""
+
+import argparse
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+from feature_engineering import DATA_PATH, load_listings, parse_listings
+from predict_price import PRICE_BAND_LABELS, price_band
+from columnar_store import load_dataset
+
+CUBE_PATH = 'market_cube.npz'
+
+DIMENSIONS = ['Company', 'TypeName', 'cpu_line', 'price_band']
+
+# Price histogram bins (INR), log-spaced, plus an underflow and an overflow bin
+PRICE_EDGES = np.geomspace(5000, 500000, 65)
+
+# Fewer listings than this and typical_price moves to a coarser segment
+MIN_SEGMENT_LISTINGS = 5
+
+
+class MarketCube:
+    """Additive price aggregates per (Company, TypeName, cpu_line, price band) cell"""
+
+    def __init__(self, categories=None, count=None, total=None, total_sq=None, histogram=None):
+        self.categories = categories or {
+            'Company': [], 'TypeName': [], 'cpu_line': [],
+            'price_band': list(range(len(PRICE_BAND_LABELS))),
+        }
+        shape = tuple(len(self.categories[dimension]) for dimension in DIMENSIONS)
+        self.count = count if count is not None else np.zeros(shape, dtype=np.int64)
+        self.total = total if total is not None else np.zeros(shape)
+        self.total_sq = total_sq if total_sq is not None else np.zeros(shape)
+        self.histogram = (histogram if histogram is not None
+                          else np.zeros(shape + (len(PRICE_EDGES) + 1,), dtype=np.int32))
+        self._positions = {dimension: {value: i for i, value in enumerate(values)}
+                           for dimension, values in self.categories.items()}
+
+    @property
+    def n_listings(self):
+        return int(self.count.sum())
+
+    def _codes(self, dimension, values):
+        """Cell index of each value along a dimension, extending the cube with values not seen yet"""
+        positions = self._positions[dimension]
+        new_values = [value for value in pd.unique(values) if value not in positions]
+        if new_values:
+            axis = DIMENSIONS.index(dimension)
+            for value in new_values:
+                positions[value] = len(self.categories[dimension])
+                self.categories[dimension].append(value)
+
+            pad = [(0, 0)] * self.count.ndim
+            pad[axis] = (0, len(new_values))
+            self.count = np.pad(self.count, pad)
+            self.total = np.pad(self.total, pad)
+            self.total_sq = np.pad(self.total_sq, pad)
+            self.histogram = np.pad(self.histogram, pad + [(0, 0)])
+
+        return pd.Series(values).map(positions).to_numpy(dtype=np.int64)
+
+    def add(self, listings):
+        """Fold parsed listings (with Price) into the cube"""
+        prices = listings['Price'].to_numpy(dtype=float)
+        cells = {
+            'Company': listings['Company'].astype(str).to_numpy(),
+            'TypeName': listings['TypeName'].astype(str).to_numpy(),
+            'cpu_line': listings['cpu_line'].fillna('Unknown').astype(str).to_numpy(),
+            'price_band': price_band(prices),
+        }
+        codes = [self._codes(dimension, cells[dimension]) for dimension in DIMENSIONS]
+
+        shape = self.count.shape
+        flat = np.ravel_multi_index(codes, shape)
+        size = int(np.prod(shape))
+        self.count += np.bincount(flat, minlength=size).reshape(shape)
+        self.total += np.bincount(flat, weights=prices, minlength=size).reshape(shape)
+        self.total_sq += np.bincount(flat, weights=prices ** 2, minlength=size).reshape(shape)
+
+        n_bins = len(PRICE_EDGES) + 1
+        bins = np.searchsorted(PRICE_EDGES, prices, side='right')
+        self.histogram += np.bincount(flat * n_bins + bins, minlength=size * n_bins).reshape(
+            self.histogram.shape).astype(np.int32)
+
+    def _selection(self, **segment):
+        index = []
+        for dimension in DIMENSIONS:
+            value = segment.get(dimension)
+            if value is None:
+                index.append(slice(None))
+            elif value in self._positions[dimension]:
+                index.append(self._positions[dimension][value])
+            else:
+                return None
+        return tuple(index)
+
+    def segment_stats(self, **segment):
+        """
+        Price statistics of a segment: any of Company, TypeName, cpu_line and
+        price_band (index into PRICE_BAND_LABELS); the others are rolled up.
+        """
+        index = self._selection(**segment)
+        if index is None:
+            return {'count': 0}
+
+        count = int(self.count[index].sum())
+        if not count:
+            return {'count': 0}
+        mean = self.total[index].sum() / count
+        variance = max(self.total_sq[index].sum() / count - mean ** 2, 0.0)
+
+        histogram = self.histogram[index].reshape(-1, len(PRICE_EDGES) + 1).sum(axis=0)
+        p25, median, p75 = histogram_quantiles(histogram, [0.25, 0.5, 0.75])
+        return {'count': count, 'mean': mean, 'std': np.sqrt(variance), 'p25': p25, 'median': median, 'p75': p75}
+
+    def rollup(self, dimensions):
+        """Count and mean price per combination of the given dimensions (non-empty groups only)"""
+        axes = tuple(i for i, dimension in enumerate(DIMENSIONS) if dimension not in dimensions)
+        count = self.count.sum(axis=axes)
+        total = self.total.sum(axis=axes)
+
+        kept = [dimension for dimension in DIMENSIONS if dimension in dimensions]
+        cells = np.argwhere(count > 0)
+        rows = {dimension: [self.categories[dimension][i] for i in cells[:, j]]
+                for j, dimension in enumerate(kept)}
+        rows['count'] = count[tuple(cells.T)]
+        rows['mean_price'] = total[tuple(cells.T)] / rows['count']
+        return pd.DataFrame(rows).sort_values('mean_price', ascending=False, ignore_index=True)
+
+    def save(self, path=CUBE_PATH):
+        np.savez_compressed(
+            path, count=self.count, total=self.total, total_sq=self.total_sq, histogram=self.histogram,
+            **{f"categories_{dimension}": np.array(self.categories[dimension]) for dimension in DIMENSIONS},
+        )
+        get_market_cube.cache_clear()
+
+    @classmethod
+    def load(cls, path=CUBE_PATH):
+        with np.load(path, allow_pickle=False) as saved:
+            categories = {dimension: saved[f"categories_{dimension}"].tolist() for dimension in DIMENSIONS}
+            return cls(categories, saved['count'], saved['total'], saved['total_sq'], saved['histogram'])
+
+
+def histogram_quantiles(histogram, quantiles):
+    """Quantiles of the prices in a PRICE_EDGES histogram, interpolated geometrically within a bin"""
+    cumulative = np.cumsum(histogram)
+    results = []
+    for q in quantiles:
+        target = q * cumulative[-1]
+        i = int(np.searchsorted(cumulative, target))
+        if i == 0:
+            results.append(float(PRICE_EDGES[0]))
+            continue
+        if i > len(PRICE_EDGES) - 1:
+            results.append(float(PRICE_EDGES[-1]))
+            continue
+        below = cumulative[i - 1]
+        share = (target - below) / histogram[i] if histogram[i] else 0.0
+        low, high = PRICE_EDGES[i - 1], PRICE_EDGES[i]
+        results.append(float(low * (high / low) ** share))
+    return results
+
+
+def build_market_cube(path=DATA_PATH):
+    """Cube over all listings of the cleaned dataset"""
+    cube = MarketCube()
+    # Read-only scan, so the columns can stay memory-mapped
+    cube.add(load_listings(path, columns=['Company', 'TypeName', 'cpu_line', 'Price'], mmap=True))
+    return cube
+
+
+@lru_cache(maxsize=None)
+def get_market_cube(cube_path=CUBE_PATH):
+    """The saved market cube, or None if it was never built"""
+    try:
+        return MarketCube.load(cube_path)
+    except FileNotFoundError:
+        return None
+
+
+def typical_price(spec, min_listings=MIN_SEGMENT_LISTINGS):
+    """
+    Market statistics for a spec's segment: (description, stats) of the most
+    specific of Company/TypeName/cpu_line, TypeName/cpu_line and TypeName
+    with at least min_listings listings, or None.
+    """
+    cube = get_market_cube()
+    if cube is None:
+        return None
+
+    for dimensions in (['Company', 'TypeName', 'cpu_line'], ['TypeName', 'cpu_line'], ['TypeName']):
+        segment = {dimension: spec.get(dimension) for dimension in dimensions}
+        stats = cube.segment_stats(**segment)
+        if stats['count'] >= min_listings:
+            return ' '.join(str(value) for value in segment.values()), stats
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--add', metavar='CSV', help='fold new listings into the saved cube instead of rebuilding it')
+    parser.add_argument('--output', default=CUBE_PATH)
+    args = parser.parse_args()
+
+    if args.add:
+        cube = get_market_cube(args.output) or MarketCube()
+        before = cube.n_listings
+        cube.add(parse_listings(load_dataset(args.add)))
+        print(f"✅ Added {cube.n_listings - before} listings ({cube.n_listings} in total)")
+    else:
+        cube = build_market_cube()
+        print(f"✅ Built cube from {cube.n_listings} listings")
+    cube.save(args.output)
+
+    shape = ' x '.join(f"{len(cube.categories[dimension])} {dimension}" for dimension in DIMENSIONS)
+    print(f"Saved {args.output}: {shape} cells, {int((cube.count > 0).sum())} non-empty")
+
+    print("\n" + "="*70)
+    print("MEAN PRICE BY COMPANY")
+    print("="*70)
+    for _, row in cube.rollup(['Company']).iterrows():
+        print(f"  {row['Company']:<12} ₹{row['mean_price']:>9,.0f}  ({row['count']} listings)")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,15 @@ import pandas as pd
 import numpy as np
 import re
 
+from columnar_store import load_dataset, convert_csv
+from feature_engineering import build_feature_store
+
 # ==================== STEP 1: LOAD DATASETS ====================
 
 print("Loading datasets...")
-old_data = pd.read_csv('laptop_data.csv')
-new_data = pd.read_csv('new_data_set.csv')
+# Columnar tables when converted (python columnar_store.py), else the CSVs
+old_data = load_dataset('laptop_data.csv')
+new_data = load_dataset('new_data_set.csv')
 
 print(f"Old dataset: {old_data.shape}")
 print(f"New dataset: {new_data.shape}")
@@ -210,6 +214,11 @@ print("="*70)
 combined_data.to_csv('laptop_data_merged_clean.csv', index=False)
 print(f"✅ Saved as 'laptop_data_merged_clean.csv'")
 
+# Typed columnar copies (raw and parsed specs) for fast, column-projected reloads
+convert_csv('laptop_data_merged_clean.csv')
+build_feature_store('laptop_data_merged_clean.csv')
+print(f"✅ Saved columnar tables 'laptop_data_merged_clean.cols' and 'laptop_data_merged_clean_features.cols'")
+
 print("\n" + "="*70)
 print("✅ DATASET PREPARATION COMPLETE!")
 print("="*70)
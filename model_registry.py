@@ -0,0 +1,84 @@
+"""
+Registry of segment-specific price models.
+
+train_model.py --segments can train smaller models per TypeName or per price
+band and list them in a manifest (model_registry.pkl). The registry routes a
+segment to its model and loads it on first use. It keeps loaded models
+under a memory cap, evicting the least recently used ones. Segments without
+their own model (or no manifest at all) use the global model.
+"""
+
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+REGISTRY_PATH = 'model_registry.pkl'
+
+# Segment models resident at the same time (bytes on disk, used as a memory proxy)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def load_manifest(manifest_path=REGISTRY_PATH):
+    """The registry manifest, or None if no segment models were trained"""
+    try:
+        with open(manifest_path, 'rb') as file:
+            return pickle.load(file)
+    except FileNotFoundError:
+        return None
+
+
+class ModelRegistry:
+    """Lazily loaded, LRU-evicted segment models with a global fallback"""
+
+    def __init__(self, manifest_path=REGISTRY_PATH, fallback=None, fallback_path=None,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        manifest = load_manifest(manifest_path) or {'segment_by': None, 'models': {}}
+        self.segment_by = manifest['segment_by']
+        self.paths = {segment: entry['path'] for segment, entry in manifest['models'].items()}
+        self.fallback = fallback
+        self.fallback_path = fallback_path
+        self.max_bytes = max_bytes
+
+        self.loads = 0
+        self.evictions = 0
+        self._loaded = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def has_segments(self):
+        return bool(self.paths)
+
+    def resident_bytes(self):
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def get(self, segment):
+        """
+        (model, scaler, feature_columns, model_path) for a segment; the global
+        model (from the fallback loader) if the segment has no model of its own.
+        """
+        path = self.paths.get(segment)
+        if path is None:
+            return (*self.fallback(), self.fallback_path)
+
+        with self._lock:
+            bundle = self._loaded.get(segment)
+            if bundle is not None:
+                self._loaded.move_to_end(segment)
+                return bundle
+
+            with open(path, 'rb') as file:
+                saved = pickle.load(file)
+            bundle = (saved['model'], saved['scaler'], saved['feature_columns'], path)
+            self.loads += 1
+
+            self._loaded[segment] = bundle
+            self._sizes[segment] = os.path.getsize(path)
+            # Always keep the model just loaded, even if it alone exceeds the cap
+            while len(self._loaded) > 1 and sum(self._sizes.values()) > self.max_bytes:
+                evicted, _ = self._loaded.popitem(last=False)
+                del self._sizes[evicted]
+                self.evictions += 1
+
+            return bundle
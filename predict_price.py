@@ -1,11 +1,53 @@
+import hashlib
 import pickle
+import time
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import LabelEncoder
 
-# Load saved model and scaler
-def load_model():
-    with open('laptop_price_model.pkl', 'rb') as file:
+from drift_monitor import DriftMonitor
+from model_registry import ModelRegistry, REGISTRY_PATH
+from request_log import get_request_logger
+from shadow import get_shadow_evaluator
+from price_table import get_price_table
+
+MODEL_PATH = 'laptop_price_model.pkl'
+
+# Stage-pruned copy of the model written by prune_model.py
+FAST_MODEL_PATH = 'laptop_price_model_fast.pkl'
+
+# Calibration data written next to the model (e.g. preview error bounds)
+METADATA_PATH = 'model_metadata.pkl'
+
+# Ordinal encodings for the label-encoded features
+CPU_LINE_MAPPING = {
+    'Core i3': 3, 'Core i5': 5, 'Core i7': 7, 'Core i9': 9,
+    'Ryzen 3': 3, 'Ryzen 5': 5, 'Ryzen 7': 7, 'Ryzen 9': 9,
+    'Pentium': 2, 'Celeron': 1, 'Xeon': 8, 'Core M': 4, 'Atom': 1,
+    'A4-Series': 1.5, 'A6-Series': 2, 'A8-Series': 2.5,
+    'A9-Series': 3, 'A10-Series': 3.5, 'A12-Series': 4,
+    'E-Series': 1, 'Unknown': 3
+}
+
+CPU_TYPE_MAPPING = {
+    'HK': 6, 'HQ': 5, 'H': 4, 'HS': 3, 'U': 2, 
+    'Y': 1, 'M': 2, 'T': 2, 'Unknown': 2
+}
+
+RESOLUTION_MAPPING = {
+    'Standard': 1, 'Full HD': 2, 'Quad HD': 3, 
+    'Quad HD+': 4, '4K Ultra HD': 5
+}
+
+# Price bands (INR) used to bucket predictions, e.g. for the conformal intervals
+PRICE_BAND_EDGES = [35000, 60000, 100000]
+PRICE_BAND_LABELS = ['Under ₹35k', '₹35k-60k', '₹60k-100k', '₹100k+']
+
+# Load saved model and scaler (once per model file)
+@lru_cache(maxsize=None)
+def load_model(model_path=MODEL_PATH):
+    with open(model_path, 'rb') as file:
         model = pickle.load(file)
     
     with open('scaler.pkl', 'rb') as file:
@@ -16,6 +58,60 @@ def load_model():
     
     return model, scaler, feature_columns
 
+@lru_cache(maxsize=None)
+def model_version(model_path=MODEL_PATH):
+    """Short content hash of a model file, identifying the model that made a prediction"""
+    with open(model_path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()[:12]
+
+@lru_cache(maxsize=None)
+def load_model_metadata(metadata_path=METADATA_PATH):
+    """Calibration data stored next to the model, or {} if it was never generated"""
+    try:
+        with open(metadata_path, 'rb') as file:
+            return pickle.load(file)
+    except FileNotFoundError:
+        return {}
+
+def save_model_metadata(section, values, metadata_path=METADATA_PATH):
+    """Store one section of the model metadata, keeping the other sections"""
+    try:
+        with open(metadata_path, 'rb') as file:
+            metadata = pickle.load(file)
+    except FileNotFoundError:
+        metadata = {}
+    
+    metadata[section] = values
+    with open(metadata_path, 'wb') as file:
+        pickle.dump(metadata, file, protocol=4)
+    
+    load_model_metadata.cache_clear()
+    get_drift_monitor.cache_clear()
+
+@lru_cache(maxsize=None)
+def get_drift_monitor():
+    """Process-wide drift monitor, or None if the metadata has no training profile"""
+    profile = load_model_metadata().get('training_profile')
+    return DriftMonitor(profile) if profile else None
+
+@lru_cache(maxsize=None)
+def get_model_registry():
+    """Process-wide registry of segment models, falling back to load_model()"""
+    return ModelRegistry(REGISTRY_PATH, fallback=load_model, fallback_path=MODEL_PATH)
+
+def route_model(user_data):
+    """(model, scaler, feature_columns, model_path) serving one request"""
+    
+    registry = get_model_registry()
+    if registry.segment_by == 'price_band':
+        # Route on the global model's price band (cheap single-row evaluation)
+        model, scaler, feature_columns = load_model()
+        x = (feature_vector(user_data, feature_columns) - scaler.mean_) / scaler.scale_
+        return registry.get(int(price_band(model.predict(x)[0])))
+    if registry.segment_by == 'TypeName':
+        return registry.get(user_data.get('TypeName'))
+    return registry.get(None)
+
 def preprocess_input(user_data, feature_columns):
     """Preprocess user input to match training data format"""
     
@@ -23,27 +119,9 @@ def preprocess_input(user_data, feature_columns):
     df = pd.DataFrame([user_data])
     
     # Label Encoding for ordinal features
-    cpu_line_mapping = {
-        'Core i3': 3, 'Core i5': 5, 'Core i7': 7, 'Core i9': 9,
-        'Ryzen 3': 3, 'Ryzen 5': 5, 'Ryzen 7': 7, 'Ryzen 9': 9,
-        'Pentium': 2, 'Celeron': 1, 'Xeon': 8, 'Core M': 4, 'Atom': 1,
-        'A4-Series': 1.5, 'A6-Series': 2, 'A8-Series': 2.5,
-        'A9-Series': 3, 'A10-Series': 3.5, 'A12-Series': 4,
-        'E-Series': 1, 'Unknown': 3
-    }
-    df['cpu_line'] = df['cpu_line'].map(cpu_line_mapping).fillna(3)
-    
-    cpu_type_mapping = {
-        'HK': 6, 'HQ': 5, 'H': 4, 'HS': 3, 'U': 2, 
-        'Y': 1, 'M': 2, 'T': 2, 'Unknown': 2
-    }
-    df['cpu_type_suffix'] = df['cpu_type_suffix'].map(cpu_type_mapping).fillna(2)
-    
-    resolution_mapping = {
-        'Standard': 1, 'Full HD': 2, 'Quad HD': 3, 
-        'Quad HD+': 4, '4K Ultra HD': 5
-    }
-    df['resolution_type'] = df['resolution_type'].map(resolution_mapping).fillna(1)
+    df['cpu_line'] = df['cpu_line'].map(CPU_LINE_MAPPING).fillna(3)
+    df['cpu_type_suffix'] = df['cpu_type_suffix'].map(CPU_TYPE_MAPPING).fillna(2)
+    df['resolution_type'] = df['resolution_type'].map(RESOLUTION_MAPPING).fillna(1)
     
     # Encode gpu_model
     le = LabelEncoder()
@@ -64,25 +142,256 @@ def preprocess_input(user_data, feature_columns):
     
     return df
 
-def predict_price(user_data):
-    """Make price prediction from user input"""
+def predict_price(user_data, fast=False, use_price_table=True, record=True):
+    """Make price prediction from user input
+
+    fast=True uses the stage-pruned model from prune_model.py, for
+    latency-critical paths that can accept its small accuracy loss.
+    Known catalog specs are looked up in the price table (price_table.py)
+    unless use_price_table=False. record=False keeps the call out of the
+    request log, the drift monitor and shadow evaluation (e.g. live
+    estimates of a spec that is still being edited).
+    """
     
-    # Load model
-    model, scaler, feature_columns = load_model()
+    start = time.perf_counter()
+    
+    monitor = get_drift_monitor() if record else None
+    if monitor is not None:
+        monitor.observe(user_data)
+    
+    # Known catalog specs are answered from the materialized price table
+    table = get_price_table() if use_price_table and not fast else None
+    prediction = table.lookup(user_data) if table is not None else None
+    table_hit = prediction is not None
     
-    # Preprocess input
-    processed_data = preprocess_input(user_data, feature_columns)
+    if table_hit:
+        version = table.model_version
+    else:
+        # Load model (the request's segment model when the registry has one)
+        model, scaler, feature_columns, model_path = route_model(user_data)
+        if fast and model_path == MODEL_PATH:
+            # Only the global model has a stage-pruned copy
+            model_path = FAST_MODEL_PATH
+            model, scaler, feature_columns = load_model(model_path)
+        
+        # Preprocess input
+        processed_data = preprocess_input(user_data, feature_columns)
+        
+        # Scale the data
+        processed_data_scaled = scaler.transform(processed_data)
+        
+        # Make prediction
+        prediction = model.predict(processed_data_scaled)[0]
+        version = model_version(model_path)
+    latency_ms = (time.perf_counter() - start) * 1e3
     
-    # Scale the data
-    processed_data_scaled = scaler.transform(processed_data)
+    if not record:
+        return prediction
     
-    # Make prediction
-    prediction = model.predict(processed_data_scaled)[0]
+    logger = get_request_logger()
+    if logger is not None:
+        logger.log(user_data, prediction, version, latency_ms)
+    
+    shadow = get_shadow_evaluator()
+    if shadow is not None:
+        shadow.submit([user_data], prediction, None if table_hit else latency_ms)
     
     # Return prediction directly - no multipliers needed
     # The model has been trained on merged dataset with modern hardware
     return prediction
 
+def preprocess_inputs(rows, feature_columns):
+    """
+    Vectorized preprocess_input for many requests (list of dicts or DataFrame).
+    
+    Every row is encoded as if it had been passed to preprocess_input on its
+    own, so batch and single predictions agree.
+    """
+    
+    df = pd.DataFrame(rows).reset_index(drop=True)
+    
+    df['cpu_line'] = df['cpu_line'].map(CPU_LINE_MAPPING).fillna(3)
+    df['cpu_type_suffix'] = df['cpu_type_suffix'].map(CPU_TYPE_MAPPING).fillna(2)
+    df['resolution_type'] = df['resolution_type'].map(RESOLUTION_MAPPING).fillna(1)
+    
+    # Single-row encoding: gpu_model is always 0 and the one-hot columns are
+    # all dropped (see feature_vector)
+    df['gpu_model'] = 0
+    
+    return df.reindex(columns=feature_columns, fill_value=0)
+
+def predict_prices(rows, fast=False, with_intervals=False):
+    """
+    Batch version of predict_price: one preprocess/scale/predict pass for all rows.
+    
+    With with_intervals=True returns (prices, lower, upper) using the
+    conformal quantiles stored in the model metadata.
+    """
+    
+    start = time.perf_counter()
+    
+    monitor = get_drift_monitor()
+    if monitor is not None:
+        monitor.observe_batch(rows)
+    
+    registry = get_model_registry()
+    global_path = FAST_MODEL_PATH if fast else MODEL_PATH
+    if not registry.has_segments():
+        model, scaler, feature_columns = load_model(global_path)
+        processed_data = preprocess_inputs(rows, feature_columns)
+        predictions = model.predict(scaler.transform(processed_data))
+        version = model_version(global_path)
+    else:
+        predictions = predict_by_segment(registry, rows, fast)
+        version = f"{model_version(global_path)}+{model_version(REGISTRY_PATH)}"
+    latency_ms = (time.perf_counter() - start) * 1e3
+    
+    logger = get_request_logger()
+    if logger is not None:
+        logger.log_batch(rows, predictions, version, latency_ms)
+    
+    shadow = get_shadow_evaluator()
+    if shadow is not None:
+        shadow.submit(rows, predictions, latency_ms)
+    
+    if not with_intervals:
+        return predictions
+    
+    half_widths = conformal_half_widths(pd.DataFrame(rows)['TypeName'], predictions)
+    return predictions, np.maximum(predictions - half_widths, 0), predictions + half_widths
+
+def predict_by_segment(registry, rows, fast=False):
+    """
+    Predict rows with their segment models, one preprocess/predict pass per model.
+    
+    fast=True predicts the rows left to the global model with its stage-pruned copy.
+    """
+    
+    df = pd.DataFrame(rows).reset_index(drop=True)
+    predictions = np.empty(len(df))
+    
+    if registry.segment_by == 'price_band':
+        # Route on the global model's price band; rows of bands without
+        # their own model keep the global prediction
+        model, scaler, feature_columns = load_model()
+        global_predictions = model.predict(scaler.transform(preprocess_inputs(df, feature_columns)))
+        segments = pd.Series(price_band(global_predictions))
+    else:
+        segments = df[registry.segment_by]
+        global_predictions = None
+    
+    for segment, index in segments.groupby(segments, dropna=False).indices.items():
+        model, scaler, feature_columns, model_path = registry.get(segment)
+        if model_path == MODEL_PATH:
+            if fast:
+                model, scaler, feature_columns = load_model(FAST_MODEL_PATH)
+            elif global_predictions is not None:
+                predictions[index] = global_predictions[index]
+                continue
+        processed_data = preprocess_inputs(df.iloc[index], feature_columns)
+        predictions[index] = model.predict(scaler.transform(processed_data))
+    
+    return predictions
+
+def score_specs(specs):
+    """Predicted prices of many specs in one vectorized pass (no request logging, drift or shadow updates)"""
+    
+    registry = get_model_registry()
+    if registry.has_segments():
+        return predict_by_segment(registry, specs)
+    model, scaler, feature_columns = load_model()
+    return model.predict(scaler.transform(preprocess_inputs(specs, feature_columns)))
+
+def price_band(price):
+    """Index into PRICE_BAND_LABELS for a price (or array of prices)"""
+    return np.searchsorted(PRICE_BAND_EDGES, price, side='right')
+
+def conformal_half_widths(type_names, prices):
+    """
+    Half-widths of the conformal intervals around predicted prices: the
+    calibrated residual quantile of each (TypeName, price band) segment,
+    falling back to the price band and then to all laptops for sparse segments.
+    """
+    
+    prices = np.asarray(prices, dtype=float)
+    conformal = load_model_metadata().get('conformal')
+    if conformal is None:
+        return np.full(len(prices), np.nan)
+    
+    type_names = np.asarray(type_names, dtype=object)
+    bands = price_band(prices)
+    
+    band_quantiles = np.array([
+        conformal['band_quantiles'].get(band, conformal['global_quantile'])
+        for band in range(len(PRICE_BAND_LABELS))
+    ])
+    half_widths = band_quantiles[bands]
+    for (type_name, band), quantile in conformal['quantiles'].items():
+        half_widths[(type_names == type_name) & (bands == band)] = quantile
+    
+    return half_widths
+
+def predict_price_interval(user_data):
+    """Predicted price with its conformal interval: (price, lower, upper)"""
+    
+    prediction = predict_price(user_data)
+    half_width = conformal_half_widths([user_data['TypeName']], [prediction])[0]
+    return prediction, max(prediction - half_width, 0), prediction + half_width
+
+def feature_vector(user_data, feature_columns):
+    """Same values as preprocess_input for one request, built without pandas"""
+    
+    encoded = dict(user_data)
+    encoded['cpu_line'] = CPU_LINE_MAPPING.get(user_data['cpu_line'], 3)
+    encoded['cpu_type_suffix'] = CPU_TYPE_MAPPING.get(user_data['cpu_type_suffix'], 2)
+    encoded['resolution_type'] = RESOLUTION_MAPPING.get(user_data['resolution_type'], 1)
+    
+    # preprocess_input fits the LabelEncoder on a single row, so gpu_model is
+    # always 0, and get_dummies(drop_first=True) drops that row's only level,
+    # so every one-hot column is left at 0
+    encoded['gpu_model'] = 0
+    
+    return np.array([[float(encoded.get(col, 0)) for col in feature_columns]])
+
+def preview_estimate(user_data, n_stages):
+    """Sum of the first n_stages boosting stages of the model serving user_data"""
+    
+    model, scaler, feature_columns, _ = route_model(user_data)
+    
+    x = (feature_vector(user_data, feature_columns) - scaler.mean_) / scaler.scale_
+    x = x.astype(np.float32)
+    
+    # Sum the first n_stages trees directly, skipping the per-call
+    # validation of model.predict
+    estimate = model.init_.predict(x)[0]
+    for tree in model.estimators_[:n_stages, 0]:
+        estimate += model.learning_rate * tree.tree_.predict(x)[0, 0]
+    return estimate
+
+def predict_price_preview(user_data):
+    """
+    Provisional price from the first boosting stages of the serving model
+    (the request's segment model when the registry has one).
+    
+    Returns (estimate, error_bound) where error_bound covers the gap to the
+    served price on the calibrated share of held-out laptops (see
+    prune_model.py). Much cheaper than predict_price, meant for live
+    estimates while the input is still changing.
+    """
+    
+    preview = load_model_metadata().get('preview', {})
+    n_stages = preview.get('n_stages')
+    if n_stages is None:
+        return predict_price(user_data, record=False), 0.0
+    return preview_estimate(user_data, n_stages), preview.get('error_bound', 0.0)
+
+def predict_price_progressive(user_data, record=True):
+    """Yield (price, error_bound, is_final): the preview first, then the full prediction"""
+    
+    estimate, error_bound = predict_price_preview(user_data)
+    yield estimate, error_bound, False
+    yield predict_price(user_data, record=record), 0.0, True
+
 # Test the function
 if __name__ == "__main__":
     test_input = {
@@ -0,0 +1,222 @@
+"""
+MATERIALIZED PRICE TABLE FOR KNOWN CATALOG PRODUCTS
+===================================================
+Batch-scores every product/spec of the catalog (new_data_set.csv) and stores
+the predictions in price_table.pkl, keyed by product and spec hash.
+predict_price answers a request whose spec matches a catalog entry with a
+dictionary lookup instead of the preprocess/scale/predict path.
+
+The table records the version of the model(s) that scored it and is only
+used while that version is still the one serving; otherwise predict_price
+falls back to the model. Rebuilding is incremental: with the same model only
+catalog specs that are not in the table yet are scored, and after a model
+change every distinct spec is rescored once in a single vectorized pass.
+
+Run as a script (train_model.py also does it) after a model or catalog change.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import pickle
+import threading
+import time
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+from columnar_store import load_dataset, source_fingerprint
+from feature_engineering import parse_listings
+
+CATALOG_PATH = 'new_data_set.csv'
+PRICE_TABLE_PATH = 'price_table.pkl'
+
+# predict_price input keys, all of which go into the spec hash
+SPEC_KEYS = [
+    'Company', 'TypeName', 'Inches', 'Ram', 'Weight', 'OpSys',
+    'cpu_company', 'cpu_line', 'cpu_generation', 'cpu_type_suffix', 'cpu_clock_speed',
+    'resolution_type', 'resolution_width', 'resolution_height', 'touchscreen', 'ips_panel', 'retina_display',
+    'gpu_company', 'gpu_series', 'gpu_model',
+    'HDD', 'SSD', 'Hybrid', 'Flash_Storage',
+]
+
+
+def _canonical(value):
+    """Hash-stable form of a spec value: numbers as floats (8 == 8.0), missing as None"""
+    if value is None:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return float(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return None if math.isnan(value) else float(value)
+    return str(value)
+
+
+def spec_hash(spec):
+    """Short hash of the predict_price inputs of a spec"""
+    canonical = [_canonical(spec.get(key)) for key in SPEC_KEYS]
+    return hashlib.sha256(json.dumps(canonical).encode()).hexdigest()[:16]
+
+
+def normalize_product(product):
+    return ' '.join(str(product).lower().split())
+
+
+def load_catalog(path=CATALOG_PATH):
+    """Catalog products as parsed specs (predict_price inputs) plus a Product column"""
+
+    catalog = load_dataset(path)
+    listings = pd.DataFrame({
+        'Company': catalog['Company'],
+        'TypeName': catalog['TypeName'],
+        'Inches': catalog['Inches'],
+        'ScreenResolution': catalog['ScreenResolution'],
+        # Same reconstruction of the raw strings as merged_dataset.py
+        'Cpu': catalog['CPU_Company'].astype(str) + ' ' + catalog['CPU_Type'].astype(str) + ' '
+               + catalog['CPU_Frequency (GHz)'].astype(str) + 'GHz',
+        'Ram': catalog['RAM (GB)'].astype(str) + 'GB',
+        'Memory': catalog['Memory'],
+        'Gpu': catalog['GPU_Company'].astype(str) + ' ' + catalog['GPU_Type'].astype(str),
+        'OpSys': catalog['OpSys'],
+        'Weight': catalog['Weight (kg)'].astype(str) + 'kg',
+    })
+
+    specs = parse_listings(listings)
+    specs['Product'] = np.asarray(catalog['Product'])
+    return specs
+
+
+def current_model_version():
+    """Version of what predict_price serves: the global model, plus the registry if it has segment models"""
+    # predict_price imports this module, so import it lazily
+    from predict_price import MODEL_PATH, model_version, get_model_registry
+    from model_registry import REGISTRY_PATH
+
+    if get_model_registry().has_segments():
+        return f"{model_version(MODEL_PATH)}+{model_version(REGISTRY_PATH)}"
+    return model_version(MODEL_PATH)
+
+
+def build_price_table(catalog_path=CATALOG_PATH, table_path=PRICE_TABLE_PATH):
+    """
+    Refresh the price table for the current model and catalog.
+
+    Returns build statistics: catalog rows, distinct specs, specs scored
+    and specs reused from the previous table.
+    """
+    # predict_price imports this module, so import it lazily
+    from predict_price import score_specs
+
+    version = current_model_version()
+    fingerprint = source_fingerprint(catalog_path)
+
+    try:
+        with open(table_path, 'rb') as file:
+            previous = pickle.load(file)
+    except FileNotFoundError:
+        previous = None
+
+    if (previous is not None and previous['model_version'] == version
+            and previous['catalog']['fingerprint'] == fingerprint):
+        n_specs = previous['rows']['spec_hash'].nunique()
+        return {'rows': previous['catalog']['rows'], 'specs': n_specs, 'scored': 0, 'reused': n_specs}
+
+    catalog = load_catalog(catalog_path)
+    catalog['spec_hash'] = [spec_hash(spec) for spec in catalog[SPEC_KEYS].to_dict('records')]
+
+    known = {}
+    if previous is not None and previous['model_version'] == version:
+        known = dict(zip(previous['rows']['spec_hash'], previous['rows']['price']))
+
+    distinct = catalog.drop_duplicates('spec_hash')
+    missing = distinct[~distinct['spec_hash'].isin(known.keys())]
+    if len(missing):
+        prices = score_specs(missing[SPEC_KEYS].to_dict('records'))
+        known.update(zip(missing['spec_hash'], prices))
+
+    rows = pd.DataFrame({
+        'product': catalog['Product'].map(normalize_product),
+        'spec_hash': catalog['spec_hash'],
+        'price': catalog['spec_hash'].map(known).astype(float),
+    }).drop_duplicates(['product', 'spec_hash']).reset_index(drop=True)
+
+    with open(table_path, 'wb') as file:
+        pickle.dump({
+            'model_version': version,
+            'catalog': {'path': catalog_path, 'fingerprint': fingerprint, 'rows': len(catalog)},
+            'rows': rows,
+        }, file, protocol=4)
+    get_price_table.cache_clear()
+
+    return {'rows': len(catalog), 'specs': len(distinct), 'scored': len(missing),
+            'reused': len(distinct) - len(missing)}
+
+
+class PriceTable:
+    """In-memory index of a price table: (product, spec hash) -> price and spec hash -> price"""
+
+    def __init__(self, saved):
+        self.model_version = saved['model_version']
+        rows = saved['rows']
+        self.by_product = dict(zip(zip(rows['product'], rows['spec_hash']), rows['price']))
+        self.by_spec = dict(zip(rows['spec_hash'], rows['price']))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.by_product)
+
+    def lookup(self, spec):
+        """Materialized price of a spec (within its Product, if given), or None"""
+        key = spec_hash(spec)
+        product = spec.get('Product')
+        price = None
+        if product is not None:
+            price = self.by_product.get((normalize_product(product), key))
+        if price is None:
+            # The price only depends on the spec, so any product with it will do
+            price = self.by_spec.get(key)
+
+        with self._lock:
+            if price is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return price
+
+
+@lru_cache(maxsize=None)
+def get_price_table(table_path=PRICE_TABLE_PATH):
+    """The price table, or None if it was never built or was scored by another model version"""
+    try:
+        with open(table_path, 'rb') as file:
+            saved = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    if saved['model_version'] != current_model_version():
+        return None
+    return PriceTable(saved)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--catalog', default=CATALOG_PATH)
+    parser.add_argument('--output', default=PRICE_TABLE_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = build_price_table(args.catalog, args.output)
+    elapsed = time.perf_counter() - start
+
+    print("\n" + "="*70)
+    print("PRICE TABLE")
+    print("="*70)
+    print(f"Catalog: {stats['rows']} rows, {stats['specs']} distinct specs")
+    print(f"Scored {stats['scored']} specs, reused {stats['reused']} in {elapsed:.2f}s")
+    print(f"✅ Saved {args.output} (model {current_model_version()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+ACCURACY-BUDGETED ENSEMBLE PRUNING
+==================================
+Walks the staged predictions of the saved GradientBoostingRegressor on the
+held-out split and keeps the smallest number of boosting stages whose MAE
+and R² stay within the given tolerance of the full model. The truncated
+model is saved next to the original and used by predict_price(fast=True).
+
+It also calibrates the preview used by predict_price_preview: how far the
+first few stages of the serving model (global or segment) can be from the
+price predict_price serves on held-out laptops. Requests routed to a segment
+model use that model in full with fast=True; only the global model is pruned.
+"""
+
+import argparse
+import copy
+import pickle
+import time
+import numpy as np
+from sklearn.metrics import r2_score, mean_absolute_error
+
+from feature_engineering import load_holdout_set
+from predict_price import (load_model, preprocess_inputs, save_model_metadata, score_specs, preview_estimate,
+                           get_model_registry, MODEL_PATH, FAST_MODEL_PATH)
+
+
+def preprocess_holdout(scaler, feature_columns):
+    """Held-out specs run through the same preprocessing as predict_price"""
+    X_test, y_test = load_holdout_set()
+    return scaler.transform(preprocess_inputs(X_test, feature_columns)), y_test.to_numpy()
+
+
+def staged_scores(staged, y):
+    """MAE and R² after every boosting stage"""
+    maes = np.array([mean_absolute_error(y, y_pred) for y_pred in staged])
+    r2s = np.array([r2_score(y, y_pred) for y_pred in staged])
+    return maes, r2s
+
+
+def select_n_stages(maes, r2s, mae_tolerance=0.02, r2_tolerance=0.005):
+    """
+    Smallest number of stages with MAE at most (1 + mae_tolerance) times the
+    full model's MAE and R² at most r2_tolerance below the full model's R².
+    """
+    within_budget = (maes <= maes[-1] * (1 + mae_tolerance)) & (r2s >= r2s[-1] - r2_tolerance)
+    return int(np.argmax(within_budget)) + 1
+
+
+def calibrate_preview(n_stages, coverage=0.9):
+    """
+    Error bound of a preview from the first n_stages of the serving model:
+    the coverage quantile of its distance to the served price on held-out laptops.
+    """
+    X_test, _ = load_holdout_set()
+    served = score_specs(X_test)
+    previews = np.array([preview_estimate(row, n_stages) for row in X_test.to_dict('records')])
+    return float(np.quantile(np.abs(previews - served), coverage))
+
+
+def truncate_model(model, n_stages):
+    """Copy of a fitted GradientBoostingRegressor keeping only its first n_stages trees"""
+    truncated = copy.deepcopy(model)
+    truncated.estimators_ = truncated.estimators_[:n_stages]
+    truncated.train_score_ = truncated.train_score_[:n_stages]
+    truncated.n_estimators = n_stages
+    truncated.n_estimators_ = n_stages
+    return truncated
+
+
+def measure_latency(model, X, repeats=200):
+    """Median seconds for a single-row predict and for a predict over all of X"""
+    single = []
+    for i in range(repeats):
+        row = X[i % len(X)].reshape(1, -1)
+        start = time.perf_counter()
+        model.predict(row)
+        single.append(time.perf_counter() - start)
+
+    batch = []
+    for _ in range(max(repeats // 20, 5)):
+        start = time.perf_counter()
+        model.predict(X)
+        batch.append(time.perf_counter() - start)
+
+    return float(np.median(single)), float(np.median(batch))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mae-tolerance', type=float, default=0.02,
+                        help='allowed relative MAE increase over the full model (default: 0.02)')
+    parser.add_argument('--r2-tolerance', type=float, default=0.005,
+                        help='allowed absolute R² drop from the full model (default: 0.005)')
+    parser.add_argument('--preview-stages', type=int, default=30,
+                        help='stages evaluated by predict_price_preview (default: 30)')
+    parser.add_argument('--preview-coverage', type=float, default=0.9,
+                        help='share of held-out previews within the error bound (default: 0.9)')
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--output', default=FAST_MODEL_PATH)
+    args = parser.parse_args()
+
+    model, scaler, feature_columns = load_model(args.model)
+    X, y = preprocess_holdout(scaler, feature_columns)
+    print(f"Held-out set: {X.shape[0]} laptops, model has {model.n_estimators_} stages")
+
+    staged = np.array(list(model.staged_predict(X)))
+    maes, r2s = staged_scores(staged, y)
+    n_stages = select_n_stages(maes, r2s, args.mae_tolerance, args.r2_tolerance)
+    truncated = truncate_model(model, n_stages)
+
+    print("\n" + "="*70)
+    print("STAGE SELECTION")
+    print("="*70)
+    print(f"Full model:      {len(maes):>4} stages | MAE ₹{maes[-1]:,.0f} | R² {r2s[-1]:.4f}")
+    print(f"Truncated model: {n_stages:>4} stages | MAE ₹{maes[n_stages - 1]:,.0f} | R² {r2s[n_stages - 1]:.4f}")
+
+    full_single, full_batch = measure_latency(model, X)
+    fast_single, fast_batch = measure_latency(truncated, X)
+
+    print("\n" + "="*70)
+    print("LATENCY (model.predict, median)")
+    print("="*70)
+    print(f"Single row:        {full_single * 1e6:,.0f} µs -> {fast_single * 1e6:,.0f} µs "
+          f"({1 - fast_single / full_single:.0%} saved)")
+    print(f"Batch of {X.shape[0]}:      {full_batch * 1e3:,.2f} ms -> {fast_batch * 1e3:,.2f} ms "
+          f"({1 - fast_batch / full_batch:.0%} saved)")
+
+    with open(args.output, 'wb') as file:
+        pickle.dump(truncated, file, protocol=4)
+
+    print(f"\n✅ Truncated model saved as '{args.output}'")
+    print("   It shares scaler.pkl and feature_columns.pkl with the full model.")
+
+    preview_stages = min(args.preview_stages, len(staged))
+    error_bound = calibrate_preview(preview_stages, args.preview_coverage)
+    save_model_metadata('preview', {
+        'n_stages': preview_stages,
+        'error_bound': error_bound,
+        'coverage': args.preview_coverage,
+    })
+
+    print(f"\n✅ Preview calibrated: {preview_stages} stages, "
+          f"±₹{error_bound:,.0f} of the served price for {args.preview_coverage:.0%} of held-out laptops")
+    if get_model_registry().has_segments():
+        print("   Segment models are served in full by fast=True; rerun this after training them.")
+
+
+if __name__ == "__main__":
+    main()
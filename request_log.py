@@ -0,0 +1,180 @@
+"""
+Buffered, append-only log of valuation requests and predictions.
+
+predict_price and predict_prices hand each request to the process-wide
+RequestLogger (if one was enabled with enable_request_log). The caller only
+appends to an in-memory buffer; a background thread serializes records as
+JSON Lines, writes them in batches and rotates the file by size, gzipping
+the rotated parts. When the buffer is full, records are dropped and counted
+rather than making the prediction wait.
+"""
+
+import atexit
+import gzip
+import json
+import math
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+LOG_PATH = os.path.join('logs', 'requests.jsonl')
+
+
+def _finite_or_none(value):
+    """NaN/inf (e.g. missing spec values) as None: strict JSON has no NaN"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _to_json(value):
+    """json.dumps fallback for numpy scalars and other non-JSON values"""
+    if hasattr(value, 'item'):
+        return _finite_or_none(value.item())
+    return str(value)
+
+
+def _json_safe(record):
+    """Record with float NaN/inf replaced by None (json.dumps does not pass floats to the fallback)"""
+    return {key: _json_safe(value) if isinstance(value, dict) else _finite_or_none(value)
+            for key, value in record.items()}
+
+
+class RequestLogger:
+    """Non-blocking JSON Lines logger with a background flush thread and size-based rotation"""
+
+    def __init__(self, path=LOG_PATH, max_bytes=10 * 1024 * 1024, backup_count=10,
+                 flush_interval=1.0, batch_size=256, max_buffer=50000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+
+        self.dropped = 0
+        self.written = 0
+        self._buffer = deque()
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='request-log-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _append(self, entry, n_records):
+        with self._lock:
+            if self._buffered + n_records > self.max_buffer:
+                self.dropped += n_records
+                return
+            self._buffer.append(entry)
+            self._buffered += n_records
+            full = self._buffered >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def log(self, spec, prediction, model_version, latency_ms):
+        """Record one predict_price call (serialized later, on the writer thread)"""
+        self._append(('single', time.time(), dict(spec), prediction, model_version, latency_ms), 1)
+
+    def log_batch(self, rows, predictions, model_version, latency_ms):
+        """Record one predict_prices call as one line per row"""
+        # The caller may reuse its rows after the prediction
+        rows = [dict(row) for row in rows] if isinstance(rows, list) else rows.copy()
+        self._append(('batch', time.time(), rows, predictions, model_version, latency_ms), len(predictions))
+
+    def _records(self, entries):
+        for kind, ts, specs, predictions, model_version, latency_ms in entries:
+            if kind == 'single':
+                yield {'ts': ts, 'spec': specs, 'prediction': predictions,
+                       'model_version': model_version, 'latency_ms': latency_ms}
+                continue
+
+            if hasattr(specs, 'to_dict'):
+                specs = specs.to_dict('records')
+            for spec, prediction in zip(specs, predictions):
+                yield {'ts': ts, 'spec': spec, 'prediction': prediction, 'model_version': model_version,
+                       'latency_ms': latency_ms, 'batch_size': len(predictions)}
+
+    def flush(self):
+        """Write everything buffered so far (normally called by the writer thread)"""
+        with self._lock:
+            entries = self._buffer
+            self._buffer = deque()
+            self._buffered = 0
+        if not entries:
+            return
+
+        lines = [json.dumps(_json_safe(record), separators=(',', ':'), default=_to_json, allow_nan=False) + '\n'
+                 for record in self._records(entries)]
+        with self._write_lock:
+            try:
+                with open(self.path, 'a', encoding='utf-8') as file:
+                    file.writelines(lines)
+            except OSError:
+                with self._lock:
+                    self.dropped += len(lines)
+                raise
+            self.written += len(lines)
+
+            if os.path.getsize(self.path) >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        """Move the full log aside as a timestamped .gz and keep the newest backup_count parts"""
+        rotated = f"{self.path}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        os.replace(self.path, rotated)
+        with open(rotated, 'rb') as source, gzip.open(rotated + '.gz', 'wb') as target:
+            shutil.copyfileobj(source, target)
+        os.remove(rotated)
+
+        directory = os.path.dirname(self.path) or '.'
+        prefix = os.path.basename(self.path) + '.'
+        parts = sorted(name for name in os.listdir(directory)
+                       if name.startswith(prefix) and name.endswith('.gz'))
+        for name in parts[:max(len(parts) - self.backup_count, 0)]:
+            os.remove(os.path.join(directory, name))
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except OSError:
+                # Never let a full disk or a vanished directory kill the writer
+                pass
+
+    def close(self):
+        """Stop the writer thread and flush the remaining records"""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+
+
+_request_logger = None
+_request_logger_lock = threading.Lock()
+
+
+def enable_request_log(path=LOG_PATH, **options):
+    """Start logging predict_price / predict_prices calls to path (once per process)"""
+    global _request_logger
+    with _request_logger_lock:
+        if _request_logger is None:
+            _request_logger = RequestLogger(path, **options)
+    return _request_logger
+
+
+def get_request_logger():
+    """The enabled RequestLogger, or None"""
+    return _request_logger
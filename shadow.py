@@ -0,0 +1,334 @@
+"""
+SHADOW EVALUATION OF A CANDIDATE MODEL
+======================================
+Runs a retrained candidate model alongside the production one on live
+traffic. predict_price / predict_prices hand a sample of their requests,
+with the production prediction and model-path latency, to the
+ShadowEvaluator enabled with enable_shadow(). That is one random draw and a
+non-blocking queue put; the candidate is scored later, in batches, on a
+background thread, so production latency is unaffected.
+
+Production's single-request latency is compared with the candidate's
+single-row cost (one row per batch is also timed on its own); requests
+production answered from the price table have no model latency and are
+counted separately.
+
+All results are kept in fixed-size streaming aggregates: running moments
+and histograms of the prediction deltas and of both models' latencies.
+
+Run as a script to replay the held-out split through production with a
+candidate in shadow and print the comparison.
+"""
+
+import argparse
+import pickle
+import queue
+import random
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+# Delta candidate - production in INR, and relative to the production price (clipped to ±100%)
+DELTA_EDGES = np.linspace(-50000, 50000, 101)
+ABS_DELTA_EDGES = np.linspace(0, 50000, 101)
+RELATIVE_DELTA_EDGES = np.linspace(-1, 1, 401)
+
+# Latency in ms, log-spaced from 1 µs to 10 s
+LATENCY_EDGES = np.logspace(-3, 4, 71)
+
+
+class StreamingStats:
+    """Count, mean, variance (Welford), extremes and a fixed-bin histogram of a stream of values"""
+
+    def __init__(self, edges):
+        self.edges = edges
+        self.histogram = np.zeros(len(edges) + 1, dtype=np.int64)
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        if not len(values):
+            return
+        n = len(values)
+        batch_mean = values.mean()
+        delta = batch_mean - self.mean
+        total = self.n + n
+        self._m2 += ((values - batch_mean) ** 2).sum() + delta ** 2 * self.n * n / total
+        self.mean += delta * n / total
+        self.n = total
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.histogram += np.bincount(np.searchsorted(self.edges, values, side='right'),
+                                      minlength=len(self.edges) + 1)
+
+    @property
+    def std(self):
+        return float(np.sqrt(self._m2 / self.n)) if self.n else 0.0
+
+    def quantile(self, q):
+        """Approximate quantile: upper edge of the histogram bin holding it"""
+        if not self.n:
+            return np.nan
+        i = int(np.searchsorted(np.cumsum(self.histogram), q * self.n))
+        if i >= len(self.edges):
+            return self.max
+        return float(self.edges[i])
+
+
+def load_candidate(path):
+    """(model, scaler, feature_columns) of a candidate: a bundle dict, or a bare model using the production scaler"""
+    with open(path, 'rb') as file:
+        saved = pickle.load(file)
+    if isinstance(saved, dict):
+        return saved['model'], saved['scaler'], saved['feature_columns']
+
+    from predict_price import load_model
+    _, scaler, feature_columns = load_model()
+    return saved, scaler, feature_columns
+
+
+class ShadowEvaluator:
+    """Scores a sample of production requests with a candidate model on a background thread"""
+
+    def __init__(self, candidate_path, sample_rate=0.1, max_queue=1000, batch_size=64,
+                 flush_interval=0.5, agreement_tolerance=0.05, seed=None):
+        self.candidate_path = candidate_path
+        self.sample_rate = sample_rate
+        self.agreement_tolerance = agreement_tolerance
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.sampled = 0
+        self.dropped = 0
+        self.errors = 0
+        self.price_table_hits = 0
+        self.failure = None
+        self.abs_delta = StreamingStats(ABS_DELTA_EDGES)
+        self.relative_delta = StreamingStats(RELATIVE_DELTA_EDGES)
+        self.signed_delta = StreamingStats(DELTA_EDGES)
+        self.agreeing = 0
+        self.production_latency = StreamingStats(LATENCY_EDGES)
+        self.candidate_latency = StreamingStats(LATENCY_EDGES)
+        self.candidate_batch_latency = StreamingStats(LATENCY_EDGES)
+        self.inside_interval = 0
+        self.interval_checked = 0
+
+        self._random = random.Random(seed)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='shadow-evaluator', daemon=True)
+        self._thread.start()
+
+    def submit(self, rows, predictions, latency_ms=None):
+        """
+        Offer production requests (list of dicts or DataFrame) for shadowing;
+        never blocks. latency_ms is production's model-path latency for the
+        call, None if it was answered from the price table.
+        """
+        if self.failure is not None or self._random.random() >= self.sample_rate:
+            return
+        if isinstance(rows, list):
+            # The caller may reuse its dicts after the prediction
+            rows = [dict(row) for row in rows]
+        predictions = np.atleast_1d(predictions)
+        with self._lock:
+            if self.failure is not None:
+                return
+            try:
+                self._queue.put_nowait((rows, predictions, latency_ms))
+                self.sampled += 1
+                if latency_ms is None:
+                    self.price_table_hits += len(predictions)
+            except queue.Full:
+                self.dropped += 1
+
+    def _drain(self):
+        items = []
+        try:
+            items.append(self._queue.get(timeout=self.flush_interval))
+            while len(items) < self.batch_size:
+                items.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return items
+
+    def _fail(self, message):
+        """Stop accepting requests and count the queued ones as errors"""
+        with self._lock:
+            self.failure = message
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self.errors += 1
+        print(f"⚠️ Shadow evaluation stopped: {message}")
+
+    def _run(self):
+        # predict_price imports this module, so import it lazily
+        from predict_price import preprocess_inputs, conformal_half_widths
+
+        try:
+            model, scaler, feature_columns = load_candidate(self.candidate_path)
+        except Exception as error:
+            self._fail(f"could not load candidate {self.candidate_path}: {error!r}")
+            return
+
+        while not (self._stopped.is_set() and self._queue.empty()):
+            items = self._drain()
+            if not items:
+                continue
+            try:
+                rows = pd.concat([pd.DataFrame(item_rows) for item_rows, _, _ in items], ignore_index=True)
+                production = np.concatenate([item_predictions for _, item_predictions, _ in items])
+                # Single requests that went through production's model path
+                production_latency = [latency for _, item_predictions, latency in items
+                                      if latency is not None and len(item_predictions) == 1]
+
+                start = time.perf_counter()
+                candidate = model.predict(scaler.transform(preprocess_inputs(rows, feature_columns)))
+                batch_latency = (time.perf_counter() - start) * 1e3 / len(rows)
+
+                # Single-row cost, comparable with a production request
+                start = time.perf_counter()
+                model.predict(scaler.transform(preprocess_inputs(rows.iloc[:1], feature_columns)))
+                candidate_latency = (time.perf_counter() - start) * 1e3
+
+                half_widths = conformal_half_widths(rows['TypeName'], production)
+                checked = ~np.isnan(half_widths)
+                delta = candidate - production
+                relative_delta = delta / np.abs(production)
+                inside = np.abs(delta)[checked] <= half_widths[checked]
+
+                with self._lock:
+                    self.signed_delta.update(delta)
+                    self.abs_delta.update(np.abs(delta))
+                    self.relative_delta.update(np.clip(relative_delta, -1, 1))
+                    self.agreeing += int((np.abs(relative_delta) <= self.agreement_tolerance).sum())
+                    self.production_latency.update(production_latency)
+                    self.candidate_latency.update(candidate_latency)
+                    self.candidate_batch_latency.update(np.full(len(rows), batch_latency))
+                    self.inside_interval += int(inside.sum())
+                    self.interval_checked += int(checked.sum())
+            except Exception:
+                with self._lock:
+                    self.errors += len(items)
+
+    def close(self, timeout=10):
+        """Score what is still queued and stop the worker"""
+        self._stopped.set()
+        self._thread.join(timeout)
+
+    def report(self):
+        """Comparison of candidate and production on the shadowed requests"""
+        with self._lock:
+            return {
+                'requests': self.abs_delta.n,
+                'sampled': self.sampled,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'failure': self.failure,
+                'price_table_hits': self.price_table_hits,
+                'mean_delta': self.signed_delta.mean,
+                'std_delta': self.signed_delta.std,
+                'mean_abs_delta': self.abs_delta.mean,
+                'abs_delta_p95': self.abs_delta.quantile(0.95),
+                'relative_delta_p05': self.relative_delta.quantile(0.05),
+                'relative_delta_p50': self.relative_delta.quantile(0.5),
+                'relative_delta_p95': self.relative_delta.quantile(0.95),
+                # Accuracy proxies without labels: share of requests where the candidate
+                # agrees within the tolerance / lies inside production's conformal interval
+                'agreement': self.agreeing / self.abs_delta.n if self.abs_delta.n else np.nan,
+                'inside_production_interval': (self.inside_interval / self.interval_checked
+                                               if self.interval_checked else np.nan),
+                # Model path of a single request vs the candidate on a single row
+                'production_latency_ms_p50': self.production_latency.quantile(0.5),
+                'production_latency_ms_p95': self.production_latency.quantile(0.95),
+                'candidate_latency_ms_p50': self.candidate_latency.quantile(0.5),
+                'candidate_latency_ms_p95': self.candidate_latency.quantile(0.95),
+                'candidate_batch_latency_ms_per_row': self.candidate_batch_latency.mean,
+            }
+
+
+_shadow = None
+_shadow_lock = threading.Lock()
+
+
+def enable_shadow(candidate_path, sample_rate=0.1, **options):
+    """Start shadowing production requests with the candidate model at candidate_path"""
+    global _shadow
+    with _shadow_lock:
+        if _shadow is not None:
+            _shadow.close()
+        _shadow = ShadowEvaluator(candidate_path, sample_rate, **options)
+    return _shadow
+
+
+def disable_shadow():
+    global _shadow
+    with _shadow_lock:
+        if _shadow is not None:
+            _shadow.close()
+        _shadow = None
+
+
+def get_shadow_evaluator():
+    """The enabled ShadowEvaluator, or None"""
+    return _shadow
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('candidate', help='candidate model pickle (bare model or {model, scaler, feature_columns})')
+    parser.add_argument('--sample-rate', type=float, default=1.0)
+    parser.add_argument('--no-price-table', action='store_true',
+                        help='answer catalog specs with the model, so every request has a production model latency')
+    args = parser.parse_args()
+
+    from feature_engineering import load_holdout_set
+    from predict_price import predict_price, preprocess_inputs
+    # predict_price reads the evaluator from the imported module, not from __main__
+    import shadow as shadow_module
+
+    X_test, y_test = load_holdout_set()
+    shadow = shadow_module.enable_shadow(args.candidate, args.sample_rate)
+
+    production = np.array([predict_price(row, use_price_table=not args.no_price_table)
+                           for row in X_test.to_dict('records')])
+    shadow.close()
+    report = shadow.report()
+    if report['failure'] is not None:
+        print(f"❌ {report['failure']}")
+        return
+
+    model, scaler, feature_columns = load_candidate(args.candidate)
+    candidate = model.predict(scaler.transform(preprocess_inputs(X_test, feature_columns)))
+
+    print("\n" + "="*70)
+    print(f"SHADOW REPORT: {args.candidate} vs production ({report['requests']} shadowed requests)")
+    print("="*70)
+    print(f"Held-out MAE:        production ₹{np.mean(np.abs(y_test - production)):,.0f} | "
+          f"candidate ₹{np.mean(np.abs(y_test - candidate)):,.0f}")
+    print(f"Delta (cand - prod): mean ₹{report['mean_delta']:,.0f}, std ₹{report['std_delta']:,.0f} | "
+          f"mean abs ₹{report['mean_abs_delta']:,.0f}, p95 abs ≤ ₹{report['abs_delta_p95']:,.0f}")
+    print(f"Relative delta:      p05 {report['relative_delta_p05']:+.1%} | p50 {report['relative_delta_p50']:+.1%} | "
+          f"p95 {report['relative_delta_p95']:+.1%}")
+    print(f"Agreement within {shadow.agreement_tolerance:.0%}: {report['agreement']:.1%} | "
+          f"inside production interval: {report['inside_production_interval']:.1%}")
+    print(f"Single request:      production model path p50 {report['production_latency_ms_p50']:.2f} ms, "
+          f"p95 {report['production_latency_ms_p95']:.2f} ms | "
+          f"candidate p50 {report['candidate_latency_ms_p50']:.2f} ms, p95 {report['candidate_latency_ms_p95']:.2f} ms")
+    print(f"Candidate batched:   {report['candidate_batch_latency_ms_per_row']:.3f} ms / row")
+    print(f"Price table hits:    {report['price_table_hits']} shadowed requests answered by lookup in production "
+          f"(no model latency)")
+    print(f"Dropped: {report['dropped']} | errors: {report['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+BUDGET-CONSTRAINED SPEC OPTIMIZER
+=================================
+Finds the laptop configurations with the best specs whose predicted market
+price fits a budget. The search space is the discrete options of app.py
+(RAM, SSD and HDD sizes, CPU line and generation, GPU series, resolution).
+
+Options the served models cannot tell apart cannot change the price, so
+they are not offered as upgrades. Two options are equivalent when their
+encoded features fall between the same split thresholds of every tree of
+the served models, e.g. all GPU series (their one-hot columns are always 0
+in preprocess_inputs) or CPU generations newer than any in the training
+data. Each component keeps the first option of every equivalence class, and
+components left with a single option are dropped from the search.
+
+Beam search from the lowest configuration: every step upgrades one
+component of each beam member by one option. The whole frontier is scored in
+one vectorized model call, configurations that are dominated (another one
+has at least the same specs for no more money) are pruned, and the best
+under budget are kept, topped up with the cheapest over budget (the price is
+not monotone in the specs, so the lowest configuration need not be the
+cheapest). The search stops when nothing can be upgraded or the time limit
+is reached.
+"""
+
+import argparse
+import time
+import numpy as np
+
+from predict_price import load_model, preprocess_inputs, get_model_registry, score_specs
+
+# Options of each component, worst to best
+SEARCH_SPACE = {
+    'ram': [2, 4, 6, 8, 12, 16, 24, 32, 64],
+    'ssd': [0, 128, 256, 512, 1024, 2048],
+    'hdd': [0, 128, 256, 512, 1024, 2048],
+    'cpu': [
+        ('AMD', 'E-Series'), ('Intel', 'Celeron'), ('Intel', 'Pentium'), ('AMD', 'A9-Series'),
+        ('Intel', 'Core i3'), ('AMD', 'Ryzen 3'), ('Intel', 'Core i5'), ('AMD', 'Ryzen 5'),
+        ('Intel', 'Core i7'), ('AMD', 'Ryzen 7'), ('Intel', 'Core i9'), ('AMD', 'Ryzen 9'),
+    ],
+    'cpu_generation': list(range(6, 15)),
+    'gpu': [
+        ('Intel', 'HD Graphics'), ('Intel', 'UHD Graphics'), ('Intel', 'Iris Plus Graphics'),
+        ('Intel', 'Iris Xe Graphics'), ('Nvidia', 'MX Series'), ('AMD', 'Radeon RX'),
+        ('Nvidia', 'GTX 10 Series'), ('Nvidia', 'GTX 16 Series'), ('Nvidia', 'RTX 20 Series'),
+        ('Nvidia', 'RTX 30 Series'), ('Nvidia', 'RTX 40 Series'), ('Nvidia', 'RTX 50 Series'),
+    ],
+    'resolution': [
+        ('Standard', 1366, 768), ('Full HD', 1920, 1080), ('Quad HD', 2560, 1440),
+        ('Quad HD+', 3200, 1800), ('4K Ultra HD', 3840, 2160),
+    ],
+}
+
+# Everything the search does not change
+DEFAULT_BASE_SPEC = {
+    'Company': 'Dell', 'TypeName': 'Notebook', 'Inches': 15.6, 'Weight': 2.0, 'OpSys': 'Windows 10',
+    'cpu_type_suffix': 'U', 'cpu_clock_speed': 2.5,
+    'touchscreen': 0, 'ips_panel': 0, 'retina_display': 0,
+    'gpu_model': 'Unknown', 'Hybrid': 0, 'Flash_Storage': 0,
+}
+
+
+def build_spec(indices, base_spec, space=SEARCH_SPACE):
+    """predict_price input for one point of a search space (components not in it take their first option)"""
+    options = {dimension: values[0] for dimension, values in SEARCH_SPACE.items()}
+    options.update({dimension: space[dimension][i] for dimension, i in zip(space, indices)})
+    cpu_company, cpu_line = options['cpu']
+    gpu_company, gpu_series = options['gpu']
+    resolution_type, width, height = options['resolution']
+    return {
+        **base_spec,
+        'Ram': options['ram'], 'SSD': options['ssd'], 'HDD': options['hdd'],
+        'cpu_company': cpu_company, 'cpu_line': cpu_line, 'cpu_generation': options['cpu_generation'],
+        'gpu_company': gpu_company, 'gpu_series': gpu_series,
+        'resolution_type': resolution_type, 'resolution_width': width, 'resolution_height': height,
+    }
+
+
+def split_thresholds(feature_columns):
+    """Sorted split thresholds (unscaled feature units) of each feature over all trees of the served models"""
+    registry = get_model_registry()
+    bundles = [load_model()] + [registry.get(segment)[:3] for segment in registry.paths]
+
+    thresholds = {column: [] for column in feature_columns}
+    for model, scaler, columns in bundles:
+        for tree in model.estimators_[:, 0]:
+            split = tree.tree_.feature >= 0
+            features = tree.tree_.feature[split]
+            raw = tree.tree_.threshold[split] * scaler.scale_[features] + scaler.mean_[features]
+            for feature, threshold in zip(features, raw):
+                thresholds[columns[feature]].append(threshold)
+    return [np.unique(thresholds[column]) for column in feature_columns]
+
+
+def effective_search_space(base_spec):
+    """
+    SEARCH_SPACE reduced to what can change the prediction: for each
+    component, one option per group of options that fall on the same side
+    of every split threshold; components with a single group are left out.
+    """
+    _, _, feature_columns = load_model()
+    thresholds = split_thresholds(feature_columns)
+    space = {}
+    for dimension, values in SEARCH_SPACE.items():
+        specs = []
+        for value in values:
+            indices = [values.index(value) if d == dimension else 0 for d in SEARCH_SPACE]
+            specs.append(build_spec(indices, base_spec))
+        encoded = preprocess_inputs(specs, feature_columns).to_numpy(dtype=float)
+        # Trees send x <= threshold left, so equal counts of thresholds below x mean the same leaves
+        visible = np.column_stack([np.searchsorted(thresholds[j], encoded[:, j], side='left')
+                                   for j in range(len(feature_columns))])
+        _, first = np.unique(visible, axis=0, return_index=True)
+        distinct = [values[i] for i in sorted(first)]
+        if len(distinct) > 1:
+            space[dimension] = distinct
+    return space
+
+
+def spec_scores(candidates, space, weights=None):
+    """
+    Spec quality: weighted sum of each component's normalized rank (0 = worst,
+    1 = best option); weights maps components to weights (default 1).
+    """
+    weights = np.array([(weights or {}).get(dimension, 1.0) for dimension in space])
+    sizes = np.array([len(values) for values in space.values()])
+    return (candidates / (sizes - 1)) @ weights
+
+
+def non_dominated(candidates, prices):
+    """Mask of candidates no other candidate beats on every component at no higher price"""
+    # Cheapest first, better specs first among equal prices: a candidate can
+    # only be dominated by one that comes before it
+    order = np.lexsort((-candidates.sum(axis=1), prices))
+    keep = np.zeros(len(candidates), dtype=bool)
+    kept = []
+    for i in order:
+        front = candidates[kept]
+        dominated = ((front >= candidates[i]).all(axis=1)
+                     & ((prices[kept] < prices[i]) | (front > candidates[i]).any(axis=1)))
+        if not dominated.any():
+            keep[i] = True
+            kept.append(i)
+    return keep
+
+
+def optimize_specs(budget, base_spec=None, top_k=10, beam_width=64, time_limit=5.0, weights=None):
+    """
+    Best specs with a predicted price within budget.
+
+    Returns up to top_k (spec, predicted_price, spec_score) tuples, best
+    specs first, together with search statistics (including the components
+    that were left out because they cannot change the price).
+    """
+    base_spec = {**DEFAULT_BASE_SPEC, **(base_spec or {})}
+    deadline = time.perf_counter() + time_limit
+    space = effective_search_space(base_spec)
+    n_dimensions = len(space)
+    sizes = np.array([len(values) for values in space.values()])
+
+    start = np.zeros((1, n_dimensions), dtype=np.int64)
+    beam = start
+    seen = {tuple(start[0])}
+    front, front_prices = start[:0], np.empty(0)
+    scored = 0
+    steps = 0
+
+    frontier = start
+    while len(frontier) and time.perf_counter() < deadline:
+        prices = score_specs([build_spec(c, base_spec, space) for c in frontier])
+        scored += len(frontier)
+        steps += 1
+
+        within = prices <= budget
+        candidates, candidate_prices = frontier[within], prices[within]
+        if len(candidates):
+            keep = non_dominated(candidates, candidate_prices)
+            candidates, candidate_prices = candidates[keep], candidate_prices[keep]
+            # Running Pareto front of everything under budget so far
+            front = np.vstack([front, candidates])
+            front_prices = np.concatenate([front_prices, candidate_prices])
+            keep = non_dominated(front, front_prices)
+            front, front_prices = front[keep], front_prices[keep]
+
+        # Best specs first, cheaper first among equals. Prices are not
+        # monotone in the specs, so spare room goes to the cheapest
+        # configurations over budget, whose upgrades may still fit.
+        order = np.lexsort((candidate_prices, -spec_scores(candidates, space, weights)))
+        over = np.argsort(prices[~within])[:max(beam_width - len(candidates), 0)]
+        beam = np.vstack([candidates[order[:beam_width]], frontier[~within][over]])
+
+        # Every one-step upgrade of every beam member not scored yet
+        children = (beam[:, None, :] + np.eye(n_dimensions, dtype=np.int64)[None, :, :]).reshape(-1, n_dimensions)
+        children = children[(children < sizes).all(axis=1)]
+        fresh = []
+        for child in children:
+            key = tuple(child)
+            if key not in seen:
+                seen.add(key)
+                fresh.append(child)
+        frontier = np.array(fresh, dtype=np.int64).reshape(-1, n_dimensions)
+
+    stats = {'steps': steps, 'scored': scored, 'timed_out': bool(len(frontier)),
+             'no_effect': [dimension for dimension in SEARCH_SPACE if dimension not in space]}
+    scores = spec_scores(front, space, weights)
+    order = np.lexsort((front_prices, -scores))[:top_k]
+    results = [(build_spec(front[i], base_spec, space), float(front_prices[i]), float(scores[i])) for i in order]
+    return results, stats
+
+
+def describe(spec, dimensions):
+    """Short text of the searched components of a spec"""
+    parts = {
+        'ram': f"{spec['Ram']}GB RAM", 'ssd': f"{spec['SSD']}GB SSD", 'hdd': f"{spec['HDD']}GB HDD",
+        'cpu': spec['cpu_line'], 'cpu_generation': f"gen {spec['cpu_generation']}",
+        'gpu': spec['gpu_series'], 'resolution': spec['resolution_type'],
+    }
+    return ', '.join(parts[dimension] for dimension in dimensions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('budget', type=float, help='maximum predicted price (INR)')
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--beam-width', type=int, default=64)
+    parser.add_argument('--time-limit', type=float, default=5.0, help='seconds (default: 5)')
+    args = parser.parse_args()
+
+    results, stats = optimize_specs(args.budget, top_k=args.top_k, beam_width=args.beam_width,
+                                    time_limit=args.time_limit)
+    searched = [dimension for dimension in SEARCH_SPACE if dimension not in stats['no_effect']]
+
+    print(f"Scored {stats['scored']:,} configurations in {stats['steps']} steps"
+          f"{' (time limit reached)' if stats['timed_out'] else ''}")
+    if stats['no_effect']:
+        print(f"Not searched, no effect on the predicted price: {', '.join(stats['no_effect'])}")
+    print("\n" + "="*70)
+    print(f"TOP {len(results)} SPECS UNDER ₹{args.budget:,.0f}")
+    print("="*70)
+    for spec, price, score in results:
+        print(f"₹{price:>9,.0f} | score {score:4.2f} | {describe(spec, searched)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""
+MODEL TRAINING PIPELINE
+=======================
+Script version of the training cells in EDA.ipynb: featurizes the cleaned
+dataset, fits the scaler and the GradientBoostingRegressor on the notebook's
+train split and saves the model artifacts.
+
+It then calibrates split-conformal price intervals on the held-out split,
+so predict_price_interval / predict_prices(with_intervals=True) only need a
+table lookup next to the point prediction, and records the accuracy and
+latency figures that app.py displays, plus the training-distribution
+profile the drift monitor compares live requests against.
+
+With --segments TypeName (or price_band) it also trains per-segment models
+for the model registry, keeping only those that beat the global model on
+a validation split of the training laptops.
+"""
+
+import argparse
+import math
+import os
+import pickle
+import re
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+from sklearn.model_selection import KFold, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from drift_monitor import training_profile
+from feature_engineering import load_listings, encode_features, split_listings, load_holdout_set
+from model_registry import REGISTRY_PATH
+from price_table import build_price_table, get_price_table
+from predict_price import (load_model, predict_price, predict_prices, predict_price_preview,
+                           preprocess_inputs, price_band, save_model_metadata, get_model_registry,
+                           MODEL_PATH, PRICE_BAND_LABELS)
+
+# Interval miscoverage: 0.1 gives 90% price ranges
+ALPHA = 0.1
+
+# Segments with fewer held-out laptops fall back to their price band
+MIN_SEGMENT_SIZE = 20
+
+CV_FOLDS = 5
+
+SEGMENT_MODEL_DIR = 'models'
+
+# Segments with fewer training laptops keep using the global model
+MIN_SEGMENT_TRAIN_ROWS = 100
+
+# Share of the train split held back to decide which segment models to keep
+VALIDATION_SIZE = 0.2
+
+
+def train():
+    """Fit the scaler and model exactly like the notebook and save the artifacts"""
+    df = encode_features(load_listings())
+    train_df, _ = split_listings(df)
+
+    X_train = train_df.drop('Price', axis=1)
+    y_train = train_df['Price']
+    X_train = X_train.fillna(X_train.median())
+
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+
+    model = GradientBoostingRegressor(random_state=42)
+    model.fit(X_train_scaled, y_train)
+
+    with open(MODEL_PATH, 'wb') as file:
+        pickle.dump(model, file, protocol=4)
+
+    with open('scaler.pkl', 'wb') as file:
+        pickle.dump(scaler, file, protocol=4)
+
+    with open('feature_columns.pkl', 'wb') as file:
+        pickle.dump(X_train.columns.tolist(), file, protocol=4)
+
+    load_model.cache_clear()
+    print(f"✅ Model trained on {len(X_train)} laptops and saved as '{MODEL_PATH}'")
+
+
+def conformal_quantile(residuals, alpha=ALPHA):
+    """Split-conformal quantile of absolute residuals, or None if there are too few of them"""
+    n = len(residuals)
+    rank = math.ceil((n + 1) * (1 - alpha))
+    if rank > n:
+        return None
+    return float(np.sort(residuals)[rank - 1])
+
+
+def calibrate_intervals(alpha=ALPHA, min_segment_size=MIN_SEGMENT_SIZE):
+    """Residual quantiles of the served model per (TypeName, price band), price band and overall"""
+    X_test, y_test = load_holdout_set()
+    predictions = predict_prices(X_test)
+
+    calibration = pd.DataFrame({
+        'TypeName': X_test['TypeName'].to_numpy(),
+        'band': price_band(predictions),
+        'residual': np.abs(y_test.to_numpy() - predictions),
+    })
+
+    quantiles = {}
+    for (type_name, band), group in calibration.groupby(['TypeName', 'band']):
+        if len(group) >= min_segment_size:
+            q = conformal_quantile(group['residual'].to_numpy(), alpha)
+            if q is not None:
+                quantiles[(type_name, int(band))] = q
+
+    band_quantiles = {}
+    for band, group in calibration.groupby('band'):
+        q = conformal_quantile(group['residual'].to_numpy(), alpha)
+        if q is not None:
+            band_quantiles[int(band)] = q
+
+    return {
+        'alpha': alpha,
+        'quantiles': quantiles,
+        'band_quantiles': band_quantiles,
+        'global_quantile': conformal_quantile(calibration['residual'].to_numpy(), alpha),
+        'n_calibration': len(calibration),
+    }
+
+
+def _fit_recipe(X, y):
+    """Fit the scaler and GradientBoostingRegressor of the training recipe (missing values filled by median)"""
+    X = X.fillna(X.median())
+    scaler = StandardScaler()
+    model = GradientBoostingRegressor(random_state=42)
+    model.fit(scaler.fit_transform(X), y)
+    return model, scaler
+
+
+def _served_specs(listings, rows, fill_rows):
+    """Specs of rows as served, missing numerics filled from fill_rows (like load_holdout_set)"""
+    specs = listings.loc[rows].drop('Price', axis=1)
+    numeric_columns = specs.select_dtypes(include=[np.number]).columns
+    specs[numeric_columns] = specs[numeric_columns].fillna(listings.loc[fill_rows, numeric_columns].median())
+    return specs
+
+
+def _served_fold_scores(listings, encoded, train_rows, test_rows):
+    """Fit the training recipe on one fold and score its test rows through the serving path"""
+    feature_columns = encoded.columns.drop('Price').tolist()
+    model, scaler = _fit_recipe(encoded.loc[train_rows, feature_columns], encoded.loc[train_rows, 'Price'])
+
+    specs = _served_specs(listings, test_rows, train_rows)
+    y = listings.loc[test_rows, 'Price'].to_numpy()
+    predictions = model.predict(scaler.transform(preprocess_inputs(specs, feature_columns)))
+    return (r2_score(y, predictions), mean_absolute_error(y, predictions),
+            np.sqrt(mean_squared_error(y, predictions)))
+
+
+def cross_validation_metrics(n_splits=CV_FOLDS, n_jobs=-1):
+    """
+    K-fold CV of the training recipe on the train split, scored like the
+    model is served: each fold's model predicts its test rows from
+    preprocess_inputs, not from the notebook encoding it was trained on.
+
+    The folds are generated once and fitted in parallel. Covers the global
+    model only, not segment models from the registry.
+    """
+    listings = load_listings()
+    encoded = encode_features(listings)
+    train_index = split_listings(listings)[0].index
+
+    folds = KFold(n_splits=n_splits, shuffle=True, random_state=42).split(train_index)
+    scores = np.array(Parallel(n_jobs=n_jobs)(
+        delayed(_served_fold_scores)(listings, encoded, train_index[train], train_index[test])
+        for train, test in folds
+    ))
+
+    return {
+        'folds': n_splits,
+        'r2_mean': float(scores[:, 0].mean()),
+        'r2_std': float(scores[:, 0].std()),
+        'mae_mean': float(scores[:, 1].mean()),
+        'rmse_mean': float(scores[:, 2].mean()),
+    }
+
+
+def holdout_metrics():
+    """Accuracy of the served prediction path on the held-out split, overall and per TypeName"""
+    X_test, y_test = load_holdout_set()
+    predictions = predict_prices(X_test)
+    y_test = y_test.to_numpy()
+
+    errors = pd.DataFrame({'TypeName': X_test['TypeName'].to_numpy(),
+                           'abs_error': np.abs(y_test - predictions)})
+    segments = {
+        type_name: {'n': int(len(group)), 'mae': float(group['abs_error'].mean())}
+        for type_name, group in errors.groupby('TypeName')
+    }
+
+    return {
+        'n': int(len(y_test)),
+        'r2': float(r2_score(y_test, predictions)),
+        'mae': float(mean_absolute_error(y_test, predictions)),
+        'rmse': float(np.sqrt(mean_squared_error(y_test, predictions))),
+        'segments': segments,
+    }
+
+
+def latency_metrics(n_requests=200):
+    """
+    Per-request latency (ms) of predict_price on the model path, of price
+    table lookups (over held-out specs the table knows only; NaN without a
+    table) and of the preview, and per-row cost of predict_prices.
+    """
+    X_test, _ = load_holdout_set()
+    rows = X_test.to_dict('records')
+    predict_price(rows[0])  # load the model and price table outside the timings
+    predict_price(rows[0], use_price_table=False)
+
+    table = get_price_table()
+    known_rows = [row for row in rows if table is not None and table.lookup(row) is not None]
+
+    def percentiles(fn, rows=rows):
+        timings = []
+        for i in range(n_requests):
+            start = time.perf_counter()
+            fn(rows[i % len(rows)])
+            timings.append((time.perf_counter() - start) * 1e3)
+        return float(np.percentile(timings, 50)), float(np.percentile(timings, 95))
+
+    single_p50, single_p95 = percentiles(lambda row: predict_price(row, use_price_table=False))
+    table_p50 = percentiles(predict_price, known_rows)[0] if known_rows else np.nan
+    preview_p50, preview_p95 = percentiles(predict_price_preview)
+
+    start = time.perf_counter()
+    predict_prices(X_test)
+    batch_per_row = (time.perf_counter() - start) * 1e3 / len(X_test)
+
+    return {
+        'predict_price_p50_ms': single_p50,
+        'predict_price_p95_ms': single_p95,
+        'price_table_p50_ms': table_p50,
+        'price_table_known_specs': len(known_rows),
+        'preview_p50_ms': preview_p50,
+        'preview_p95_ms': preview_p95,
+        'batch_per_row_ms': batch_per_row,
+    }
+
+
+def train_segment_models(segment_by='TypeName', min_rows=MIN_SEGMENT_TRAIN_ROWS):
+    """
+    Train one model per segment (TypeName, or price band of the listing price)
+    and write the registry manifest.
+
+    Segments are chosen on a validation split of the train rows, so the
+    held-out split stays untouched for the conformal calibration and the
+    reported metrics: a segment model is kept only if it beats the global
+    recipe, both fitted on the rest of the train rows, on the validation
+    laptops routed to it. Kept models are then refitted on all train rows of
+    their segment. Segment models are trained on preprocess_inputs features,
+    the encoding they are served with.
+    """
+    listings = load_listings()
+    encoded = encode_features(listings)
+    train_index = split_listings(listings)[0].index
+    fit_index, validation_index = train_test_split(train_index, test_size=VALIDATION_SIZE, random_state=42)
+    feature_columns = load_model()[2]
+
+    if segment_by == 'price_band':
+        segments = pd.Series(price_band(listings['Price']), index=listings.index)
+    else:
+        segments = listings[segment_by]
+
+    # Global recipe on the fit rows only, as the baseline and (for price bands) the router
+    global_model, global_scaler = _fit_recipe(encoded.loc[fit_index, feature_columns], encoded.loc[fit_index, 'Price'])
+    validation_specs = _served_specs(listings, validation_index, fit_index)
+    y_validation = listings.loc[validation_index, 'Price'].to_numpy()
+    global_predictions = global_model.predict(
+        global_scaler.transform(preprocess_inputs(validation_specs, feature_columns)))
+    if segment_by == 'price_band':
+        validation_segments = price_band(global_predictions)
+    else:
+        validation_segments = validation_specs[segment_by].to_numpy()
+
+    def fit_segment(rows):
+        specs = _served_specs(listings, rows, rows)
+        return _fit_recipe(preprocess_inputs(specs, feature_columns), listings.loc[rows, 'Price'])
+
+    os.makedirs(SEGMENT_MODEL_DIR, exist_ok=True)
+    models = {}
+    for segment in sorted(segments.loc[train_index].unique()):
+        rows = train_index[segments.loc[train_index].to_numpy() == segment]
+        fit_rows = rows[rows.isin(fit_index)]
+        routed = validation_segments == segment
+        if len(rows) < min_rows or not routed.any():
+            continue
+
+        model, scaler = fit_segment(fit_rows)
+        processed = preprocess_inputs(validation_specs[routed], feature_columns)
+        segment_mae = mean_absolute_error(y_validation[routed], model.predict(scaler.transform(processed)))
+        global_mae = mean_absolute_error(y_validation[routed], global_predictions[routed])
+
+        name = PRICE_BAND_LABELS[segment] if segment_by == 'price_band' else segment
+        kept = segment_mae < global_mae
+        print(f"  {name:<20} train={len(rows):<5} validation={routed.sum():<4} "
+              f"MAE ₹{segment_mae:,.0f} vs global ₹{global_mae:,.0f} {'✅ kept' if kept else '❌ global is better'}")
+        if not kept:
+            continue
+
+        model, scaler = fit_segment(rows)
+        path = os.path.join(SEGMENT_MODEL_DIR, f"segment_{re.sub(r'[^A-Za-z0-9]+', '_', str(name)).strip('_')}.pkl")
+        with open(path, 'wb') as file:
+            pickle.dump({'model': model, 'scaler': scaler, 'feature_columns': feature_columns}, file, protocol=4)
+        models[int(segment) if segment_by == 'price_band' else segment] = {
+            'path': path, 'n_train': int(len(rows)), 'validation_mae': float(segment_mae),
+        }
+
+    with open(REGISTRY_PATH, 'wb') as file:
+        pickle.dump({'segment_by': segment_by, 'models': models}, file, protocol=4)
+    get_model_registry.cache_clear()
+
+    print(f"✅ Registry saved as '{REGISTRY_PATH}' with {len(models)} segment models")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--skip-fit', action='store_true',
+                        help='keep the saved model and only recompute its calibration data')
+    parser.add_argument('--alpha', type=float, default=ALPHA,
+                        help=f'interval miscoverage (default: {ALPHA})')
+    parser.add_argument('--segments', choices=['TypeName', 'price_band'],
+                        help='also train segment models for the model registry')
+    args = parser.parse_args()
+
+    if not args.skip_fit:
+        train()
+
+    if args.segments:
+        print("\n" + "="*70)
+        print(f"SEGMENT MODELS (by {args.segments})")
+        print("="*70)
+        train_segment_models(args.segments)
+    elif not args.skip_fit and os.path.exists(REGISTRY_PATH):
+        # Segment models were chosen against the previous global model
+        os.remove(REGISTRY_PATH)
+        get_model_registry.cache_clear()
+        print(f"🗑️ Removed '{REGISTRY_PATH}': segment models of the previous model are no longer served "
+              f"(retrain them with --segments)")
+
+    train_listings, _ = split_listings(load_listings())
+    save_model_metadata('training_profile', training_profile(train_listings))
+
+    conformal = calibrate_intervals(args.alpha)
+    save_model_metadata('conformal', conformal)
+
+    # Rescore the catalog for this model before timing the known-spec path
+    price_table = build_price_table()
+
+    metrics = {
+        'holdout': holdout_metrics(),
+        'cross_validation': cross_validation_metrics(),
+        'latency': latency_metrics(),
+    }
+    save_model_metadata('metrics', metrics)
+
+    print("\n" + "="*70)
+    print(f"CONFORMAL INTERVALS ({1 - args.alpha:.0%} coverage, {conformal['n_calibration']} held-out laptops)")
+    print("="*70)
+    print(f"Overall: ±₹{conformal['global_quantile']:,.0f}")
+    for band, q in sorted(conformal['band_quantiles'].items()):
+        print(f"  {PRICE_BAND_LABELS[band]:<12} ±₹{q:,.0f}")
+    for (type_name, band), q in sorted(conformal['quantiles'].items()):
+        print(f"  {type_name:<20} {PRICE_BAND_LABELS[band]:<12} ±₹{q:,.0f}")
+
+    holdout = metrics['holdout']
+    cv = metrics['cross_validation']
+    latency = metrics['latency']
+
+    print("\n" + "="*70)
+    print("MODEL METRICS")
+    print("="*70)
+    print(f"Held-out ({holdout['n']} laptops): R² {holdout['r2']:.4f} | "
+          f"MAE ₹{holdout['mae']:,.0f} | RMSE ₹{holdout['rmse']:,.0f}")
+    print(f"{cv['folds']}-fold CV: R² {cv['r2_mean']:.4f} ± {cv['r2_std']:.4f} | "
+          f"MAE ₹{cv['mae_mean']:,.0f} | RMSE ₹{cv['rmse_mean']:,.0f}")
+    for type_name, segment in sorted(holdout['segments'].items()):
+        print(f"  {type_name:<20} n={segment['n']:<4} MAE ₹{segment['mae']:,.0f}")
+    print(f"predict_price (model path): p50 {latency['predict_price_p50_ms']:.2f} ms, p95 {latency['predict_price_p95_ms']:.2f} ms | "
+          f"preview p50 {latency['preview_p50_ms']:.3f} ms | batch {latency['batch_per_row_ms']:.3f} ms/row")
+
+    print(f"Price table: {price_table['specs']} catalog specs, {price_table['scored']} rescored, "
+          f"lookup p50 {latency['price_table_p50_ms']:.3f} ms "
+          f"(over the {latency['price_table_known_specs']} held-out specs the table knows)")
+    
+    if not args.skip_fit or args.segments:
+        print("\n💡 Run prune_model.py to refresh the fast model and the preview calibration")
+
+
+if __name__ == "__main__":
+    main()